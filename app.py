@@ -14,19 +14,26 @@ import plotly.graph_objects as go
 import pandas as pd
 import os
 import sys
+import queue
+import threading
+from contextlib import contextmanager
+from dataclasses import replace
 
 # Ajouter le répertoire parent au path
 sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
 
 from database import (
-    init_database, get_db_session,
+    init_database, get_db_session, EmotionRecord,
     create_user, get_user_by_username, get_user_by_email,
     update_user_login, update_user_consent,
     add_emotion_record, get_user_emotions, get_emotion_statistics, get_emotion_trend,
-    add_conversation_message, get_conversation_history, clear_conversation_history
+    add_conversation_message, get_conversation_history, get_conversation_count,
+    clear_conversation_history, get_emotion_writer,
+    invalidate_user_stats_cache
 )
 from auth import (
-    hash_password, verify_password, create_access_token,
+    hash_password, verify_password_async, clear_password_cache,
+    create_access_token, clear_token_cache,
     validate_registration, ValidationError
 )
 from emotion_detection import (
@@ -44,8 +51,42 @@ st.set_page_config(
     initial_sidebar_state="expanded"
 )
 
-# Initialiser la base de données
-init_database()
+# Initialiser la base de données une seule fois par processus :
+# cache_resource évite de repayer le create_all à chaque rerun
+@st.cache_resource
+def _init_database_once():
+    init_database()
+    return True
+
+
+_init_database_once()
+
+# Couleurs Plotly par émotion (clés anglaises et libellés traduits)
+_EMOTION_COLOR_MAP = {
+    'happy': '#4CAF50',
+    'sad': '#2196F3',
+    'angry': '#f44336',
+    'neutral': '#9E9E9E',
+    'surprise': '#FF9800',
+    'fear': '#9C27B0',
+    'disgust': '#795548'
+}
+
+# Ordre canonique des émotions et masques pour le score de bien-être
+_EMOTION_ORDER = ('happy', 'sad', 'angry', 'neutral', 'surprise', 'fear', 'disgust')
+_POSITIVE_MASK = np.array([e == 'happy' for e in _EMOTION_ORDER])
+_NEGATIVE_MASK = np.array([e in ('sad', 'angry', 'fear') for e in _EMOTION_ORDER])
+
+# Clés de session à effacer lors de la déconnexion (y compris le moteur
+# de conversation, le détecteur et l'analyseur : ils portent l'historique
+# et le contexte émotionnel de l'utilisateur)
+_AUTH_KEYS = (
+    'authenticated', 'user_id', 'username', 'token', 'consent_webcam',
+    'current_emotion', 'emotion_confidence', 'chat_history',
+    'webcam_active', 'page',
+    'conversation_engine', 'emotion_detector', 'emotion_analyzer',
+    'confirm_delete_emotions', 'confirm_delete_conversations'
+)
 
 # ==================== STYLES CSS ====================
 
@@ -121,6 +162,102 @@ st.markdown("""
 </style>
 """, unsafe_allow_html=True)
 
+# ==================== RESSOURCES PARTAGÉES ====================
+
+@contextmanager
+def db_scope(readonly=False):
+    """
+    Ouvre une session DB pour la durée d'un rendu de page
+    readonly=True prend une session du pool de lecture (parallélisable
+    sous WAL) au lieu de la connexion d'écriture unique
+    """
+    db = get_db_session(readonly=readonly)
+    try:
+        yield db
+    finally:
+        db.close()
+
+
+@st.cache_resource
+def start_emotion_writer():
+    """Démarre (une seule fois) le thread d'écriture des émotions"""
+    # Le writer vit dans le module database ; on lui passe l'invalidation
+    # du cache de statistiques à exécuter après chaque lot persisté
+    return get_emotion_writer(on_flush=load_emotion_stats.clear)
+
+
+def get_detector():
+    """
+    Retourne le détecteur d'émotions de la session
+    L'état de suivi (buffer de stabilisation, ROI, porte anti-frames
+    statiques) est propre à un flux : seul le lourd (les cascades,
+    chargées au niveau module) est partagé entre sessions
+    """
+    if 'emotion_detector' not in st.session_state:
+        st.session_state['emotion_detector'] = EmotionDetector()
+    return st.session_state['emotion_detector']
+
+
+def get_conversation_engine(api_key):
+    """
+    Retourne le moteur de conversation de la session
+    L'historique et le contexte émotionnel alimentent le prompt : les
+    partager entre sessions ferait fuiter la conversation d'un
+    utilisateur chez un autre (les caches lourds — prompts de classe,
+    sonde Ollama — restent au niveau module)
+    """
+    if 'conversation_engine' not in st.session_state:
+        st.session_state['conversation_engine'] = ConversationEngine(api_key)
+    return st.session_state['conversation_engine']
+
+
+@st.cache_data(ttl=5)
+def _exists_username(username):
+    """Vérifie (avec cache court) si un nom d'utilisateur est déjà pris"""
+    with db_scope(readonly=True) as db:
+        return get_user_by_username(db, username) is not None
+
+
+@st.cache_data(ttl=5)
+def _exists_email(email):
+    """Vérifie (avec cache court) si un email est déjà utilisé"""
+    with db_scope(readonly=True) as db:
+        return get_user_by_email(db, email) is not None
+
+
+@st.cache_data(ttl=60)
+def load_emotion_stats(user_id, days):
+    """Charge statistiques et tendance émotionnelles (mises en cache 60 s)"""
+    with db_scope(readonly=True) as db:
+        stats = get_emotion_statistics(db, user_id, days=days)
+        trend = get_emotion_trend(db, user_id, days=days)
+    return stats, trend
+
+
+@st.cache_data(ttl=60)
+def build_trend_figure(trend):
+    """Construit le graphique d'évolution émotionnelle (mis en cache 60 s)"""
+    df = pd.DataFrame(trend)
+
+    fig = px.bar(
+        df,
+        x='date',
+        y='total_detections',
+        color='dominant_emotion',
+        color_discrete_map=_EMOTION_COLOR_MAP,
+        labels={
+            'date': 'Date',
+            'total_detections': 'Nombre de détections',
+            'dominant_emotion': 'Émotion'
+        }
+    )
+    fig.update_layout(
+        plot_bgcolor='rgba(0,0,0,0)',
+        paper_bgcolor='rgba(0,0,0,0)',
+    )
+    return fig
+
+
 # ==================== SESSION STATE ====================
 
 def init_session_state():
@@ -135,8 +272,6 @@ def init_session_state():
         'emotion_confidence': 0.0,
         'chat_history': [],
         'emotion_analyzer': EmotionAnalyzer(),
-        'detector': None,
-        'conversation_engine': None,
         'webcam_active': False,
         'page': 'login'
     }
@@ -168,32 +303,43 @@ def show_login_page():
                 
                 if submit:
                     if username and password:
-                        db = get_db_session()
-                        user = get_user_by_username(db, username)
-                        
-                        if user and verify_password(password, user.password_hash):
-                            # Connexion réussie
-                            update_user_login(db, user.id)
+                        # Recherche + vérification sur le pool de LECTURE :
+                        # une session d'écriture prend le verrou SQLite dès
+                        # son premier ordre (BEGIN IMMEDIATE) et le
+                        # garderait pendant tout le bcrypt (jusqu'à 5 s),
+                        # en affamant le thread d'écriture des émotions
+                        with db_scope(readonly=True) as db:
+                            user = get_user_by_username(db, username)
+
+                            # Vérification dans le pool bcrypt : les logins de
+                            # sessions concurrentes se parallélisent
+                            verified = bool(user) and verify_password_async(
+                                password, user.password_hash
+                            ).result(timeout=5)
+
+                        if verified:
+                            # Connexion réussie : la session d'écriture
+                            # n'est ouverte que le temps de la mise à jour
+                            with db_scope() as db:
+                                update_user_login(db, user.id)
                             token = create_access_token(user.id, user.username)
-                            
+
                             st.session_state['authenticated'] = True
                             st.session_state['user_id'] = user.id
                             st.session_state['username'] = user.username
                             st.session_state['token'] = token
                             st.session_state['consent_webcam'] = user.consent_webcam
                             st.session_state['page'] = 'dashboard'
-                            
-                            # Initialiser le moteur de conversation
-                            api_key = os.getenv("ANTHROPIC_API_KEY")
-                            st.session_state['conversation_engine'] = ConversationEngine(api_key)
-                            
+
+                            # Préchauffer le moteur de conversation
+                            # de la session
+                            get_conversation_engine(os.getenv("ANTHROPIC_API_KEY"))
+
                             st.success("✅ Connexion réussie !")
                             time.sleep(1)
                             st.rerun()
                         else:
                             st.error("❌ Nom d'utilisateur ou mot de passe incorrect")
-                        
-                        db.close()
                     else:
                         st.warning("⚠️ Veuillez remplir tous les champs")
         
@@ -213,23 +359,25 @@ def show_login_page():
                     try:
                         # Validation
                         validate_registration(new_username, new_email, new_password, confirm_password)
-                        
-                        db = get_db_session()
-                        
-                        # Vérifier si l'utilisateur existe
-                        if get_user_by_username(db, new_username):
+
+                        # Vérifier si l'utilisateur existe (vérifications en
+                        # cache pour les re-soumissions après erreur)
+                        if _exists_username(new_username):
                             st.error("❌ Ce nom d'utilisateur est déjà pris")
-                        elif get_user_by_email(db, new_email):
+                        elif _exists_email(new_email):
                             st.error("❌ Cet email est déjà utilisé")
                         else:
                             # Créer l'utilisateur
                             hashed = hash_password(new_password)
-                            user = create_user(db, new_username, new_email, hashed)
-                            
+                            with db_scope() as db:
+                                user = create_user(db, new_username, new_email, hashed)
+
+                            # Invalider les vérifications d'existence
+                            _exists_username.clear()
+                            _exists_email.clear()
+
                             st.success("✅ Compte créé avec succès ! Vous pouvez maintenant vous connecter.")
-                        
-                        db.close()
-                        
+
                     except ValidationError as e:
                         st.error(f"❌ {str(e)}")
 
@@ -270,9 +418,12 @@ def show_dashboard():
         st.markdown("---")
         
         if st.button("🚪 Déconnexion", use_container_width=True):
-            # Réinitialiser la session
-            for key in list(st.session_state.keys()):
-                del st.session_state[key]
+            # Réinitialiser uniquement les clés liées à l'utilisateur,
+            # sans toucher aux ressources partagées
+            for key in _AUTH_KEYS:
+                st.session_state.pop(key, None)
+            clear_password_cache()
+            clear_token_cache()
             st.rerun()
     
     # Contenu principal selon la page
@@ -292,10 +443,9 @@ def show_home_dashboard():
     """Page d'accueil du dashboard"""
     st.markdown('<h1 class="main-header">🎭 Tableau de Bord</h1>', unsafe_allow_html=True)
     
-    # Récupérer les statistiques
-    db = get_db_session()
-    stats = get_emotion_statistics(db, st.session_state['user_id'], days=7)
-    
+    # Récupérer les statistiques (mises en cache)
+    stats, trend = load_emotion_stats(st.session_state['user_id'], 7)
+
     # Cards de statistiques
     col1, col2, col3, col4 = st.columns(4)
     
@@ -325,15 +475,16 @@ def show_home_dashboard():
         )
     
     with col4:
-        conversations = get_conversation_history(db, st.session_state['user_id'])
+        # Seul le compte est affiché : COUNT SQL au lieu de charger
+        # tous les messages pour en mesurer la longueur
+        with db_scope(readonly=True) as db:
+            message_count = get_conversation_count(db, st.session_state['user_id'])
         st.metric(
             "💬 Messages échangés",
-            len(conversations),
+            message_count,
             help="Total de messages avec l'assistant"
         )
-    
-    db.close()
-    
+
     st.markdown("---")
     
     # Graphique d'évolution
@@ -341,39 +492,9 @@ def show_home_dashboard():
     
     with col1:
         st.subheader("📈 Évolution émotionnelle (7 jours)")
-        
-        db = get_db_session()
-        trend = get_emotion_trend(db, st.session_state['user_id'], days=7)
-        db.close()
-        
+
         if trend:
-            df = pd.DataFrame(trend)
-            
-            # Créer un graphique
-            fig = px.bar(
-                df,
-                x='date',
-                y='total_detections',
-                color='dominant_emotion',
-                color_discrete_map={
-                    'happy': '#4CAF50',
-                    'sad': '#2196F3',
-                    'angry': '#f44336',
-                    'neutral': '#9E9E9E',
-                    'surprise': '#FF9800',
-                    'fear': '#9C27B0',
-                    'disgust': '#795548'
-                },
-                labels={
-                    'date': 'Date',
-                    'total_detections': 'Nombre de détections',
-                    'dominant_emotion': 'Émotion'
-                }
-            )
-            fig.update_layout(
-                plot_bgcolor='rgba(0,0,0,0)',
-                paper_bgcolor='rgba(0,0,0,0)',
-            )
+            fig = build_trend_figure(trend)
             st.plotly_chart(fig, use_container_width=True)
         else:
             st.info("📊 Pas encore de données. Commencez par utiliser la détection d'émotions !")
@@ -421,9 +542,8 @@ def show_emotion_detection():
         """)
         
         if st.button("✅ J'accepte l'utilisation de ma webcam", use_container_width=True):
-            db = get_db_session()
-            update_user_consent(db, st.session_state['user_id'], True)
-            db.close()
+            with db_scope() as db:
+                update_user_consent(db, st.session_state['user_id'], True)
             st.session_state['consent_webcam'] = True
             st.rerun()
         return
@@ -451,63 +571,170 @@ def show_emotion_detection():
         if start_detection:
             st.session_state['webcam_active'] = True
             
-            # Initialiser le détecteur si nécessaire
-            if st.session_state['detector'] is None:
-                with st.spinner("Chargement du modèle de détection..."):
-                    st.session_state['detector'] = EmotionDetector()
-            
+            # Récupérer le détecteur de la session (les cascades, elles,
+            # sont déjà chargées une seule fois au niveau module)
+            with st.spinner("Chargement du modèle de détection..."):
+                detector = get_detector()
+
             # Capture webcam
             cap = cv2.VideoCapture(0)
-            
+
             if not cap.isOpened():
                 st.error("❌ Impossible d'accéder à la webcam. Vérifiez qu'elle est connectée et autorisée.")
             else:
-                detector = st.session_state['detector']
+                # Réduire la latence : buffer d'une seule frame pour toujours
+                # obtenir l'image la plus récente (au lieu de ~4 frames de retard)
+                cap.set(cv2.CAP_PROP_BUFFERSIZE, 1)
+                # MJPEG à 640x480 : décodage moins coûteux que le H.264
+                cap.set(cv2.CAP_PROP_FOURCC, cv2.VideoWriter_fourcc(*'MJPG'))
+                cap.set(cv2.CAP_PROP_FRAME_WIDTH, 640)
+                cap.set(cv2.CAP_PROP_FRAME_HEIGHT, 480)
+
                 analyzer = st.session_state['emotion_analyzer']
-                db = get_db_session()
-                
+                writer = start_emotion_writer()
+
+                # Pipeline capture/détection : la détection tourne dans un
+                # thread dédié pour que la capture continue de drainer le
+                # buffer de la webcam pendant l'analyse
+                stop_event = threading.Event()
+                detect_queue = queue.Queue(maxsize=1)
+                detection = {'result': None, 'seq': 0}
+
+                def _detection_worker():
+                    """Analyse la dernière frame déposée et publie le résultat"""
+                    while not stop_event.is_set():
+                        try:
+                            small = detect_queue.get(timeout=0.5)
+                        except queue.Empty:
+                            continue
+                        detection['result'] = detector.detect_emotion(small)
+                        detection['seq'] += 1
+
+                worker = threading.Thread(
+                    target=_detection_worker,
+                    daemon=True,
+                    name="emotion-detection"
+                )
+                worker.start()
+
+                # Références locales : évite les lookups d'attributs et de
+                # globals répétés à 30 Hz dans la boucle
+                _grab = cap.grab
+                _retrieve = cap.retrieve
+                _resize = cv2.resize
+                _imencode = cv2.imencode
+                _image = video_placeholder.image
+                _perf_counter = time.perf_counter
+                _sleep = time.sleep
+                _session = st.session_state
+
                 frame_count = 0
-                
-                while st.session_state['webcam_active']:
-                    ret, frame = cap.read()
-                    
-                    if not ret:
+                last_seq = 0
+                display_result = None
+                next_tick = _perf_counter()
+
+                while _session['webcam_active']:
+                    # Ne décoder que les frames analysées : grab() saisit la frame
+                    # sans la décoder, retrieve() fait le décodage complet.
+                    # 4 frames sur 5 évitent ainsi le décodage JPEG/H.264.
+                    if not _grab():
                         st.warning("⚠️ Problème de lecture de la webcam")
                         break
-                    
+
                     # Détecter l'émotion toutes les 5 frames
                     if frame_count % 5 == 0:
-                        result = detector.detect_emotion(frame)
-                        
-                        if result:
+                        ret, frame = _retrieve()
+
+                        if not ret:
+                            st.warning("⚠️ Problème de lecture de la webcam")
+                            break
+
+                        # Déposer une version réduite pour le thread de
+                        # détection, en remplaçant l'éventuelle frame périmée
+                        small = _resize(frame, (320, 240), interpolation=cv2.INTER_AREA)
+                        try:
+                            detect_queue.put_nowait(small)
+                        except queue.Full:
+                            try:
+                                detect_queue.get_nowait()
+                            except queue.Empty:
+                                pass
+                            try:
+                                detect_queue.put_nowait(small)
+                            except queue.Full:
+                                pass
+
+                        result = detection['result']
+
+                        # Traiter uniquement les nouveaux résultats
+                        if result and detection['seq'] != last_seq:
+                            last_seq = detection['seq']
+
                             # Mettre à jour l'état
-                            st.session_state['current_emotion'] = result.emotion
-                            st.session_state['emotion_confidence'] = result.confidence
-                            
+                            _session['current_emotion'] = result.emotion
+                            _session['emotion_confidence'] = result.confidence
+
                             # Ajouter à l'analyseur
                             analyzer.add_emotion(result)
-                            
+
                             # Sauvegarder en base (toutes les 30 frames)
+                            # via le thread d'écriture pour ne pas bloquer la capture
                             if frame_count % 30 == 0:
-                                add_emotion_record(
-                                    db,
-                                    st.session_state['user_id'],
+                                writer.enqueue(
+                                    _session['user_id'],
                                     result.emotion,
                                     result.confidence
                                 )
-                            
-                            # Dessiner l'overlay
-                            frame = detector.draw_emotion_overlay(frame, result)
-                    
-                    # Convertir BGR -> RGB pour l'affichage
-                    frame_rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-                    video_placeholder.image(frame_rgb, channels="RGB", use_container_width=True)
-                    
+
+                            # Remettre le cadre du visage à l'échelle de la
+                            # frame affichée, dans une copie : le détecteur
+                            # peut resservir le même objet résultat (porte
+                            # anti-frames statiques), le muter ici le
+                            # remettrait à l'échelle à chaque publication
+                            if result.face_box:
+                                scale_x = frame.shape[1] / 320
+                                scale_y = frame.shape[0] / 240
+                                x, y, w, h = result.face_box
+                                display_result = replace(result, face_box=(
+                                    int(x * scale_x), int(y * scale_y),
+                                    int(w * scale_x), int(h * scale_y)
+                                ))
+                            else:
+                                display_result = result
+
+                        # Dessiner l'overlay avec le dernier résultat connu
+                        # (en place : la frame décodée est jetable)
+                        if display_result:
+                            frame = detector.draw_emotion_overlay(
+                                frame, display_result, in_place=True
+                            )
+
+                        # Encoder en JPEG (libjpeg-turbo, SIMD) : évite la
+                        # sérialisation PNG de Streamlit et réduit le payload
+                        # websocket ; imencode gère directement le BGR
+                        ok, buf = _imencode(
+                            '.jpg', frame,
+                            [int(cv2.IMWRITE_JPEG_QUALITY), 80]
+                        )
+                        if ok:
+                            _image(buf.tobytes(), use_container_width=True)
+
                     frame_count += 1
-                    time.sleep(0.03)  # ~30 FPS
-                
+
+                    # Cadencement en boucle fermée : viser ~30 FPS en déduisant
+                    # le temps déjà passé dans l'itération
+                    next_tick += 1 / 30
+                    delay = next_tick - _perf_counter()
+                    if delay > 0:
+                        _sleep(delay)
+                    else:
+                        # En retard : repartir de maintenant au lieu de cumuler
+                        next_tick = _perf_counter()
+
+                # Arrêt propre du thread de détection
+                stop_event.set()
+                worker.join(timeout=1)
                 cap.release()
-                db.close()
     
     with col2:
         st.subheader("📊 Analyse en temps réel")
@@ -552,12 +779,8 @@ def show_chat_interface():
     """Interface de chat avec l'assistant IA"""
     st.markdown('<h1 class="main-header">💬 Assistant Émoji</h1>', unsafe_allow_html=True)
     
-    # Initialiser le moteur de conversation si nécessaire
-    if st.session_state['conversation_engine'] is None:
-        api_key = os.getenv("ANTHROPIC_API_KEY")
-        st.session_state['conversation_engine'] = ConversationEngine(api_key)
-    
-    engine = st.session_state['conversation_engine']
+    # Récupérer le moteur de conversation de la session
+    engine = get_conversation_engine(os.getenv("ANTHROPIC_API_KEY"))
     
     # Mise à jour du contexte émotionnel
     if st.session_state['current_emotion']:
@@ -589,10 +812,9 @@ def show_chat_interface():
             st.session_state['chat_history'] = []
             
             # Effacer aussi en base
-            db = get_db_session()
-            clear_conversation_history(db, st.session_state['user_id'])
-            db.close()
-            
+            with db_scope() as db:
+                clear_conversation_history(db, st.session_state['user_id'])
+
             st.success("Historique effacé !")
             st.rerun()
         
@@ -635,40 +857,50 @@ def show_chat_interface():
                 'content': user_input
             })
             
-            # Sauvegarder en base
-            db = get_db_session()
-            add_conversation_message(
-                db,
-                st.session_state['user_id'],
-                'user',
-                user_input,
-                st.session_state['current_emotion']
-            )
-            
-            # Générer la réponse
-            with st.spinner("Émoji réfléchit..."):
-                response = engine.generate_response(
+            # Insérer le message utilisateur en parallèle du streaming LLM :
+            # le commit SQLite se recouvre avec la latence réseau
+            def _persist_user_message(user_id, content, emotion):
+                with db_scope() as db:
+                    add_conversation_message(db, user_id, 'user', content, emotion)
+
+            user_writer = threading.Thread(
+                target=_persist_user_message,
+                args=(
+                    st.session_state['user_id'],
                     user_input,
-                    st.session_state['current_emotion'],
-                    st.session_state['emotion_confidence']
-                )
-            
+                    st.session_state['current_emotion']
+                ),
+                daemon=True
+            )
+            user_writer.start()
+
+            # Générer la réponse en streaming (affichage au fil des tokens)
+            with chat_container:
+                with st.chat_message("assistant", avatar="🤗"):
+                    response = st.write_stream(engine.generate_response_stream(
+                        user_input,
+                        st.session_state['current_emotion'],
+                        st.session_state['emotion_confidence']
+                    ))
+
             # Ajouter la réponse
             st.session_state['chat_history'].append({
                 'role': 'assistant',
                 'content': response
             })
-            
-            # Sauvegarder en base
-            add_conversation_message(
-                db,
-                st.session_state['user_id'],
-                'assistant',
-                response,
-                st.session_state['current_emotion']
-            )
-            
-            db.close()
+
+            # Sauvegarder la réponse une fois le stream terminé, après
+            # l'écriture du message utilisateur (ordre en base préservé)
+            user_writer.join()
+            with db_scope() as db:
+                add_conversation_message(
+                    db,
+                    st.session_state['user_id'],
+                    'assistant',
+                    response,
+                    st.session_state['current_emotion']
+                )
+
             st.rerun()
 
 
@@ -676,24 +908,20 @@ def show_statistics():
     """Page des statistiques émotionnelles"""
     st.markdown('<h1 class="main-header">📊 Statistiques Émotionnelles</h1>', unsafe_allow_html=True)
     
-    db = get_db_session()
-    
     # Sélection de la période
     period = st.selectbox(
         "Période d'analyse",
         ["7 derniers jours", "30 derniers jours", "90 derniers jours"],
         index=0
     )
-    
+
     days = {"7 derniers jours": 7, "30 derniers jours": 30, "90 derniers jours": 90}[period]
-    
-    # Statistiques
-    stats = get_emotion_statistics(db, st.session_state['user_id'], days=days)
-    trend = get_emotion_trend(db, st.session_state['user_id'], days=days)
-    
+
+    # Statistiques (mises en cache)
+    stats, trend = load_emotion_stats(st.session_state['user_id'], days)
+
     if stats.get('total_records', 0) == 0:
         st.info("📊 Pas encore de données pour cette période. Utilisez la détection d'émotions pour commencer !")
-        db.close()
         return
     
     # Métriques en haut
@@ -707,14 +935,14 @@ def show_statistics():
         st.metric("Émotion dominante", dominant_fr)
     
     with col3:
-        # Calcul du "score de bien-être"
+        # Calcul du "score de bien-être" (agrégation vectorisée)
         dist = stats.get('distribution', {})
-        positive = dist.get('happy', {}).get('percentage', 0)
-        negative = (
-            dist.get('sad', {}).get('percentage', 0) +
-            dist.get('angry', {}).get('percentage', 0) +
-            dist.get('fear', {}).get('percentage', 0)
-        )
+        percentages = np.array([
+            dist.get(emotion, {}).get('percentage', 0)
+            for emotion in _EMOTION_ORDER
+        ])
+        positive = percentages[_POSITIVE_MASK].sum()
+        negative = percentages[_NEGATIVE_MASK].sum()
         wellbeing = max(0, min(100, 50 + positive - negative))
         st.metric("Score bien-être", f"{wellbeing:.0f}/100")
     
@@ -726,32 +954,30 @@ def show_statistics():
     with col1:
         st.subheader("🥧 Distribution des émotions")
         
-        # Préparer les données
-        dist_data = []
-        for emotion, data in stats['distribution'].items():
-            dist_data.append({
-                'Émotion': EMOTION_TRANSLATIONS.get(emotion, emotion),
-                'Pourcentage': data['percentage'],
-                'Nombre': data['count']
+        # Préparer les données (traduction vectorisée via .map)
+        df = pd.DataFrame.from_dict(stats['distribution'], orient='index')\
+            .reset_index().rename(columns={
+                'index': 'emotion',
+                'percentage': 'Pourcentage',
+                'count': 'Nombre'
             })
-        
-        if dist_data:
-            df = pd.DataFrame(dist_data)
-            
+
+        if not df.empty:
+            df['Émotion'] = df['emotion'].map(EMOTION_TRANSLATIONS).fillna(df['emotion'])
+
+            # Ne transmettre à Plotly que les couleurs des émotions présentes
+            color_map = {
+                EMOTION_TRANSLATIONS[emotion]: _EMOTION_COLOR_MAP[emotion]
+                for emotion in df['emotion'].unique()
+                if emotion in _EMOTION_COLOR_MAP
+            }
+
             fig = px.pie(
                 df,
                 values='Pourcentage',
                 names='Émotion',
                 color='Émotion',
-                color_discrete_map={
-                    '😊 Heureux': '#4CAF50',
-                    '😢 Triste': '#2196F3',
-                    '😠 En colère': '#f44336',
-                    '😐 Neutre': '#9E9E9E',
-                    '😲 Surpris': '#FF9800',
-                    '😨 Peur': '#9C27B0',
-                    '🤢 Dégoût': '#795548'
-                }
+                color_discrete_map=color_map
             )
             fig.update_traces(textposition='inside', textinfo='percent+label')
             st.plotly_chart(fig, use_container_width=True)
@@ -785,20 +1011,17 @@ def show_statistics():
     st.markdown("---")
     st.subheader("📋 Détail par émotion")
     
-    detail_data = []
-    for emotion, data in stats['distribution'].items():
-        detail_data.append({
-            'Émotion': EMOTION_TRANSLATIONS.get(emotion, emotion),
-            'Occurrences': data['count'],
-            'Pourcentage': f"{data['percentage']}%",
-            'Confiance moyenne': f"{data['avg_confidence']*100:.1f}%"
+    detail = pd.DataFrame.from_dict(stats['distribution'], orient='index')\
+        .reset_index().rename(columns={'index': 'emotion'})
+
+    if not detail.empty:
+        df = pd.DataFrame({
+            'Émotion': detail['emotion'].map(EMOTION_TRANSLATIONS).fillna(detail['emotion']),
+            'Occurrences': detail['count'],
+            'Pourcentage': detail['percentage'].astype(str) + '%',
+            'Confiance moyenne': (detail['avg_confidence'] * 100).round(1).astype(str) + '%'
         })
-    
-    if detail_data:
-        df = pd.DataFrame(detail_data)
         st.dataframe(df, use_container_width=True, hide_index=True)
-    
-    db.close()
 
 
 def show_settings():
@@ -810,18 +1033,16 @@ def show_settings():
     with col1:
         st.subheader("👤 Informations du compte")
         
-        db = get_db_session()
-        user = get_user_by_username(db, st.session_state['username'])
-        
-        if user:
-            st.text_input("Nom d'utilisateur", value=user.username, disabled=True)
-            st.text_input("Email", value=user.email, disabled=True)
-            st.text_input("Membre depuis", value=user.created_at.strftime("%d/%m/%Y"), disabled=True)
-            
-            last_login = user.last_login.strftime("%d/%m/%Y %H:%M") if user.last_login else "Jamais"
-            st.text_input("Dernière connexion", value=last_login, disabled=True)
-        
-        db.close()
+        with db_scope() as db:
+            user = get_user_by_username(db, st.session_state['username'])
+
+            if user:
+                st.text_input("Nom d'utilisateur", value=user.username, disabled=True)
+                st.text_input("Email", value=user.email, disabled=True)
+                st.text_input("Membre depuis", value=user.created_at.strftime("%d/%m/%Y"), disabled=True)
+
+                last_login = user.last_login.strftime("%d/%m/%Y %H:%M") if user.last_login else "Jamais"
+                st.text_input("Dernière connexion", value=last_login, disabled=True)
     
     with col2:
         st.subheader("🔒 Confidentialité")
@@ -839,9 +1060,8 @@ def show_settings():
         )
         
         if consent != st.session_state['consent_webcam']:
-            db = get_db_session()
-            update_user_consent(db, st.session_state['user_id'], consent)
-            db.close()
+            with db_scope() as db:
+                update_user_consent(db, st.session_state['user_id'], consent)
             st.session_state['consent_webcam'] = consent
             st.success("✅ Préférence mise à jour !")
     
@@ -855,15 +1075,21 @@ def show_settings():
     with col1:
         if st.button("🗑️ Effacer mon historique émotionnel", use_container_width=True):
             if st.session_state.get('confirm_delete_emotions'):
-                db = get_db_session()
-                # Supprimer les émotions
-                from database.models import EmotionRecord
-                db.query(EmotionRecord).filter(
-                    EmotionRecord.user_id == st.session_state['user_id']
-                ).delete()
-                db.commit()
-                db.close()
-                
+                with db_scope() as db:
+                    # Supprimer les émotions en un seul DELETE SQL :
+                    # synchronize_session=False évite le SELECT préalable
+                    # que SQLAlchemy ferait pour synchroniser sa session
+                    db.query(EmotionRecord).filter(
+                        EmotionRecord.user_id == st.session_state['user_id']
+                    ).delete(synchronize_session=False)
+                    db.commit()
+                # Invalider les deux niveaux de cache : celui de la page
+                # (st.cache_data) et le cache TTL de crud, sinon les
+                # statistiques serviraient les lignes supprimées jusqu'à
+                # expiration (60 s)
+                invalidate_user_stats_cache(st.session_state['user_id'])
+                load_emotion_stats.clear()
+
                 st.success("✅ Historique émotionnel effacé !")
                 st.session_state['confirm_delete_emotions'] = False
             else:
@@ -873,13 +1099,11 @@ def show_settings():
     with col2:
         if st.button("🗑️ Effacer mes conversations", use_container_width=True):
             if st.session_state.get('confirm_delete_conversations'):
-                db = get_db_session()
-                clear_conversation_history(db, st.session_state['user_id'])
-                db.close()
-                
+                with db_scope() as db:
+                    clear_conversation_history(db, st.session_state['user_id'])
+
                 st.session_state['chat_history'] = []
-                if st.session_state['conversation_engine']:
-                    st.session_state['conversation_engine'].clear_history()
+                get_conversation_engine(os.getenv("ANTHROPIC_API_KEY")).clear_history()
                 
                 st.success("✅ Conversations effacées !")
                 st.session_state['confirm_delete_conversations'] = False
@@ -11,11 +11,16 @@ from .authentication import (
     # Password management
     hash_password,
     verify_password,
-    
+    clear_password_cache,
+    needs_rehash,
+    hash_password_async,
+    verify_password_async,
+
     # Token management
     create_access_token,
     decode_access_token,
     is_token_valid,
+    clear_token_cache,
     
     # Validation
     validate_username,
@@ -32,9 +37,14 @@ __all__ = [
     "ValidationError",
     "hash_password",
     "verify_password",
+    "clear_password_cache",
+    "needs_rehash",
+    "hash_password_async",
+    "verify_password_async",
     "create_access_token",
     "decode_access_token",
     "is_token_valid",
+    "clear_token_cache",
     "validate_username",
     "validate_email",
     "validate_password",
@@ -4,8 +4,13 @@ Gestion sécurisée de l'authentification avec bcrypt et JWT
 """
 
 import bcrypt
+import hashlib
+import hmac
 import jwt
 import os
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from functools import lru_cache
 from datetime import datetime, timedelta
 from typing import Optional, Dict, Any
 import re
@@ -14,6 +19,18 @@ import re
 SECRET_KEY = os.getenv("JWT_SECRET_KEY", "your-secret-key-change-in-production-123!")
 ALGORITHM = "HS256"
 ACCESS_TOKEN_EXPIRE_HOURS = 24
+_TOKEN_EXPIRE_SECS = ACCESS_TOKEN_EXPIRE_HOURS * 3600
+
+# Coût bcrypt configurable via BCRYPT_ROUNDS (borné entre 10 et 15)
+_BCRYPT_ROUNDS = max(10, min(15, int(os.getenv("BCRYPT_ROUNDS", "12"))))
+
+# Hash factice : équilibre le temps de réponse quand le hash stocké est
+# malformé, pour éviter un oracle temporel sur ce chemin d'échec
+_DUMMY_HASH = bcrypt.hashpw(b"x", bcrypt.gensalt(rounds=_BCRYPT_ROUNDS))
+
+# Expressions régulières de validation (compilées une fois au chargement)
+_USERNAME_RE = re.compile(r'^[a-zA-Z0-9_]+$')
+_EMAIL_RE = re.compile(r'^[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}$')
 
 
 class AuthenticationError(Exception):
@@ -36,11 +53,36 @@ def hash_password(password: str) -> str:
     Returns:
         Hash du mot de passe
     """
-    salt = bcrypt.gensalt(rounds=12)
+    salt = bcrypt.gensalt(rounds=_BCRYPT_ROUNDS)
     hashed = bcrypt.hashpw(password.encode('utf-8'), salt)
     return hashed.decode('utf-8')
 
 
+def needs_rehash(hashed_password: str) -> bool:
+    """
+    Vérifie si un hash stocké utilise un coût inférieur au coût actuel
+    Args:
+        hashed_password: Hash bcrypt stocké (format $2b$NN$...)
+    Returns:
+        True si le hash devrait être recalculé au coût courant
+    """
+    try:
+        # Format bcrypt : $2b$NN$<salt+hash>
+        cost = int(hashed_password.split('$')[2])
+        return cost < _BCRYPT_ROUNDS
+    except (IndexError, ValueError):
+        return True
+
+
+# Cache des vérifications réussies : évite de repayer le coût bcrypt
+# (~250 ms) pour des identifiants déjà validés dans ce processus.
+# Clé = (SHA-256 du mot de passe, hash stocké) pour ne pas garder le
+# mot de passe en clair en mémoire ; seuls les succès sont mis en cache,
+# un échec repasse donc toujours par bcrypt
+_VERIFY_CACHE_SIZE = 256
+_verify_cache: Dict[tuple, bool] = {}
+
+
 def verify_password(password: str, hashed_password: str) -> bool:
     """
     Vérifie si un mot de passe correspond au hash
@@ -50,14 +92,58 @@ def verify_password(password: str, hashed_password: str) -> bool:
     Returns:
         True si correspondance, False sinon
     """
+    # Hash stocké malformé : payer quand même un checkpw complet pour que
+    # ce chemin d'échec ait le même profil temporel qu'un vrai mismatch
+    if len(hashed_password) != 60 or not hashed_password.startswith('$2'):
+        bcrypt.checkpw(password.encode('utf-8'), _DUMMY_HASH)
+        return False
+
+    cache_key = (
+        hashlib.sha256(password.encode('utf-8')).digest(),
+        hashed_password
+    )
+    if cache_key in _verify_cache:
+        return True
+
     try:
-        return bcrypt.checkpw(
-            password.encode('utf-8'), 
+        valid = bcrypt.checkpw(
+            password.encode('utf-8'),
             hashed_password.encode('utf-8')
         )
     except Exception:
         return False
 
+    if valid:
+        # Éviction FIFO simple quand le cache est plein
+        if len(_verify_cache) >= _VERIFY_CACHE_SIZE:
+            _verify_cache.pop(next(iter(_verify_cache)))
+        _verify_cache[cache_key] = True
+
+    return valid
+
+
+def clear_password_cache():
+    """Vide le cache des vérifications de mot de passe (ex: déconnexion)"""
+    _verify_cache.clear()
+
+
+# Pool dédié aux opérations bcrypt : le code C de bcrypt relâche le GIL,
+# les hachages de sessions distinctes se parallélisent donc réellement
+_BCRYPT_POOL = ThreadPoolExecutor(
+    max_workers=os.cpu_count() or 2,
+    thread_name_prefix="bcrypt"
+)
+
+
+def hash_password_async(password: str) -> Future:
+    """Hash un mot de passe dans le pool bcrypt (retourne un Future)"""
+    return _BCRYPT_POOL.submit(hash_password, password)
+
+
+def verify_password_async(password: str, hashed_password: str) -> Future:
+    """Vérifie un mot de passe dans le pool bcrypt (retourne un Future)"""
+    return _BCRYPT_POOL.submit(verify_password, password, hashed_password)
+
 
 # ==================== TOKEN MANAGEMENT ====================
 
@@ -70,17 +156,38 @@ def create_access_token(user_id: int, username: str) -> str:
     Returns:
         Token JWT
     """
-    expire = datetime.utcnow() + timedelta(hours=ACCESS_TOKEN_EXPIRE_HOURS)
+    # Timestamps epoch entiers : évite deux allocations datetime et leur
+    # reconversion par PyJWT (la spec JWT accepte exp/iat en entiers)
+    now = int(time.time())
     payload = {
         "user_id": user_id,
         "username": username,
-        "exp": expire,
-        "iat": datetime.utcnow()
+        "exp": now + _TOKEN_EXPIRE_SECS,
+        "iat": now
     }
     token = jwt.encode(payload, SECRET_KEY, algorithm=ALGORITHM)
     return token
 
 
+@lru_cache(maxsize=1024)
+def _decode_raw(token: str) -> Dict[str, Any]:
+    """
+    Décode un token et vérifie sa signature (sans contrôle d'expiration)
+    Mis en cache : la vérification HMAC + parse JSON ne se paye qu'une
+    fois par token, l'expiration étant contrôlée en direct par l'appelant
+    """
+    return jwt.decode(
+        token, SECRET_KEY,
+        algorithms=[ALGORITHM],
+        options={"verify_exp": False}
+    )
+
+
+def clear_token_cache():
+    """Vide le cache des tokens décodés (ex: déconnexion)"""
+    _decode_raw.cache_clear()
+
+
 def decode_access_token(token: str) -> Optional[Dict[str, Any]]:
     """
     Décode et vérifie un token JWT
@@ -90,13 +197,16 @@ def decode_access_token(token: str) -> Optional[Dict[str, Any]]:
         Payload du token ou None si invalide
     """
     try:
-        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
-        return payload
-    except jwt.ExpiredSignatureError:
-        raise AuthenticationError("Token expiré. Veuillez vous reconnecter.")
+        payload = _decode_raw(token)
     except jwt.InvalidTokenError:
         raise AuthenticationError("Token invalide.")
 
+    # L'expiration est évaluée en direct, hors cache
+    if payload.get("exp", 0) <= time.time():
+        raise AuthenticationError("Token expiré. Veuillez vous reconnecter.")
+
+    return payload
+
 
 def is_token_valid(token: str) -> bool:
     """Vérifie si un token est valide"""
@@ -118,7 +228,7 @@ def validate_username(username: str) -> bool:
     if not username or len(username) < 3 or len(username) > 20:
         raise ValidationError("Le nom d'utilisateur doit contenir entre 3 et 20 caractères.")
     
-    if not re.match(r'^[a-zA-Z0-9_]+$', username):
+    if not _USERNAME_RE.match(username):
         raise ValidationError("Le nom d'utilisateur ne peut contenir que des lettres, chiffres et underscores.")
     
     return True
@@ -129,8 +239,7 @@ def validate_email(email: str) -> bool:
     if not email:
         raise ValidationError("L'email est requis.")
     
-    email_pattern = r'^[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}$'
-    if not re.match(email_pattern, email):
+    if not _EMAIL_RE.match(email):
         raise ValidationError("Format d'email invalide.")
     
     return True
@@ -147,13 +256,26 @@ def validate_password(password: str) -> bool:
     if not password or len(password) < 8:
         raise ValidationError("Le mot de passe doit contenir au moins 8 caractères.")
     
-    if not re.search(r'[A-Z]', password):
+    # Un seul parcours de la chaîne au lieu de trois scans regex,
+    # avec arrêt anticipé dès que les trois classes sont trouvées
+    has_upper = has_lower = has_digit = False
+    for char in password:
+        if char.isupper():
+            has_upper = True
+        elif char.islower():
+            has_lower = True
+        elif char.isdigit():
+            has_digit = True
+        if has_upper and has_lower and has_digit:
+            break
+
+    if not has_upper:
         raise ValidationError("Le mot de passe doit contenir au moins une majuscule.")
-    
-    if not re.search(r'[a-z]', password):
+
+    if not has_lower:
         raise ValidationError("Le mot de passe doit contenir au moins une minuscule.")
-    
-    if not re.search(r'\d', password):
+
+    if not has_digit:
         raise ValidationError("Le mot de passe doit contenir au moins un chiffre.")
     
     return True
@@ -161,13 +283,19 @@ def validate_password(password: str) -> bool:
 
 def validate_registration(username: str, email: str, password: str, confirm_password: str) -> bool:
     """Valide toutes les données d'inscription"""
+    # Vérification la moins coûteuse en premier : la faute de frappe dans
+    # la confirmation est l'erreur la plus fréquente, inutile de payer les
+    # regex avant. compare_digest rend en plus la comparaison à temps constant
+    if not hmac.compare_digest(
+        (password or "").encode('utf-8'),
+        (confirm_password or "").encode('utf-8')
+    ):
+        raise ValidationError("Les mots de passe ne correspondent pas.")
+
     validate_username(username)
     validate_email(email)
     validate_password(password)
-    
-    if password != confirm_password:
-        raise ValidationError("Les mots de passe ne correspondent pas.")
-    
+
     return True
 
 
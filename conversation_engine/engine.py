@@ -5,12 +5,31 @@ Supporte: Ollama (LOCAL), Groq (GRATUIT), Claude (payant), ou mode hors-ligne
 """
 
 import os
-from typing import List, Dict, Optional, Any
+import random
+import time
+from collections import deque
+from typing import List, Dict, Optional, Any, Iterator, Deque
 from dataclasses import dataclass
 from datetime import datetime
 import logging
 import json
 import requests
+from requests.adapters import HTTPAdapter
+
+# orjson (optionnel) : sérialisation JSON nettement plus rapide pour les
+# corps de requêtes Ollama ; repli transparent sur le json standard
+try:
+    import orjson
+
+    def _json_dumps(obj) -> bytes:
+        return orjson.dumps(obj)
+
+    _json_loads = orjson.loads
+except ImportError:
+    def _json_dumps(obj) -> bytes:
+        return json.dumps(obj).encode('utf-8')
+
+    _json_loads = json.loads
 
 # Configuration du logging
 logging.basicConfig(level=logging.INFO)
@@ -23,17 +42,21 @@ class Message:
     role: str  # 'user' ou 'assistant'
     content: str
     emotion_context: Optional[str] = None
-    timestamp: datetime = None
-    
-    def __post_init__(self):
-        if self.timestamp is None:
-            self.timestamp = datetime.utcnow()
-    
+    # Horodatage paresseux : rempli à la lecture, pas à la construction
+    # (évite deux appels datetime.utcnow() par échange)
+    timestamp: Optional[datetime] = None
+
     def to_dict(self) -> Dict[str, str]:
         """Convertit en format API"""
         return {"role": self.role, "content": self.content}
 
 
+# Cache du sondage de disponibilité d'Ollama : url -> (timestamp, résultat)
+# Évite de repayer le timeout de la requête à chaque construction du moteur
+_OLLAMA_PROBE_CACHE: Dict[str, tuple] = {}
+_OLLAMA_PROBE_TTL = 60  # secondes
+
+
 # Traduction des émotions en français pour le contexte
 EMOTION_CONTEXT_FR = {
     "happy": "heureux/heureuse",
@@ -51,7 +74,17 @@ class ConversationEngine:
     Moteur de conversation empathique
     Priorité: Ollama (local) > Groq (gratuit) > Claude (payant)
     """
-    
+
+    # Attributs d'instance figés : accès via descripteurs de slots
+    # (plus rapide qu'un __dict__) et empreinte mémoire réduite
+    __slots__ = (
+        "ollama_url", "ollama_model", "_http",
+        "groq_api_key", "anthropic_api_key",
+        "client", "api_type",
+        "conversation_history", "current_emotion", "emotion_history",
+        "_same_streak", "_rng"
+    )
+
     # Prompt système pour l'assistant empathique
     SYSTEM_PROMPT = """Tu es un assistant IA empathique et bienveillant nommé "Émoji" 🤗.
     
@@ -87,6 +120,93 @@ Ton rôle est d'accompagner l'utilisateur en fonction de son état émotionnel d
 
 Sois authentique, chaleureux et aide l'utilisateur à se sentir écouté et compris."""
 
+    # Message système pré-construit : le dict est partagé entre tous les
+    # appels au lieu d'être reconstruit à chaque message
+    _SYSTEM_MSG = {"role": "system", "content": SYSTEM_PROMPT}
+
+    # Réponses de secours pré-définies par émotion (tuples immuables,
+    # construits une seule fois au chargement de la classe)
+    _FALLBACK_RESPONSES = {
+        "happy": (
+            "Ça fait plaisir de te voir de bonne humeur ! 😊 Qu'est-ce qui te rend si joyeux aujourd'hui ?",
+            "Ton sourire est contagieux ! Continue comme ça ! Raconte-moi ta journée ?",
+            "Super ! J'adore cette énergie positive ! Qu'est-ce qui s'est passé de bien ?"
+        ),
+        "sad": (
+            "Je vois que tu traverses un moment difficile... Je suis là pour toi. 💙 Tu veux en parler ?",
+            "C'est ok de ne pas aller bien parfois. Qu'est-ce qui te tracasse ?",
+            "Je suis là pour t'écouter, sans jugement. Prends ton temps pour me dire ce qui ne va pas."
+        ),
+        "angry": (
+            "Je comprends que tu sois frustré(e). Prends une grande respiration... 🌬️ Qu'est-ce qui s'est passé ?",
+            "La colère, c'est normal. Veux-tu en parler pour te libérer un peu ?",
+            "Je t'écoute. Parfois, exprimer ce qui nous énerve fait du bien."
+        ),
+        "neutral": (
+            "Hey ! Comment vas-tu ? Qu'est-ce qui t'amène aujourd'hui ? 👋",
+            "Coucou ! Je suis content de te voir. De quoi voudrais-tu parler ?",
+            "Salut ! Comment se passe ta journée jusqu'ici ?"
+        ),
+        "fear": (
+            "Je suis là, tout va bien se passer. 🤗 Qu'est-ce qui t'inquiète ?",
+            "Respire doucement... Je comprends que tu puisses te sentir anxieux. Parle-moi.",
+            "Tu n'es pas seul(e). Dis-moi ce qui te fait peur, on peut en discuter ensemble."
+        ),
+        "surprise": (
+            "Oh ! Tu as l'air surpris(e) ! Il s'est passé quelque chose d'inattendu ?",
+            "Wow, je vois la surprise sur ton visage ! Raconte-moi !",
+            "Qu'est-ce qui t'a surpris comme ça ? Je suis curieux !"
+        ),
+        "disgust": (
+            "Hmm, quelque chose ne semble pas te plaire... Tu veux en parler ?",
+            "Je vois que quelque chose te dérange. Qu'est-ce qui s'est passé ?",
+            "On dirait que tu as vécu quelque chose de désagréable. Je t'écoute."
+        )
+    }
+
+    # Messages d'accueil par émotion
+    _GREETINGS = {
+        "happy": "Hey ! 😊 Je vois que tu es de bonne humeur ! Ça fait plaisir !",
+        "sad": "Bonjour... 💙 Je suis là si tu as besoin de parler.",
+        "angry": "Salut. Je vois que quelque chose te tracasse. Je t'écoute.",
+        "neutral": "Bonjour ! 👋 Comment puis-je t'aider aujourd'hui ?",
+        "fear": "Coucou... 🤗 Je suis là, tout va bien. De quoi voudrais-tu parler ?",
+        "surprise": "Oh ! Bonjour ! Tu as l'air surpris(e) de me voir ! 😄",
+        "disgust": "Salut... Quelque chose ne va pas ? Je suis là pour en parler."
+    }
+
+    # Conseils bien-être par émotion
+    _WELLNESS_TIPS = {
+        "happy": (
+            "💡 Astuce : Note ce moment de bonheur dans un journal pour t'en souvenir !",
+            "💡 Partage ta bonne humeur avec quelqu'un, la joie est contagieuse !",
+            "💡 Profite de cette énergie pour faire quelque chose que tu aimes !"
+        ),
+        "sad": (
+            "💡 Astuce : Une petite promenade à l'air frais peut aider à éclaircir les idées.",
+            "💡 Écoute une musique que tu aimes, ça peut aider à remonter le moral.",
+            "💡 Prends un moment pour toi : un thé chaud, une couverture, et du repos."
+        ),
+        "angry": (
+            "💡 Astuce : Essaie la respiration 4-7-8 : inspire 4s, retiens 7s, expire 8s.",
+            "💡 L'exercice physique aide à évacuer la frustration. Une petite marche ?",
+            "💡 Écris ce qui t'énerve sur un papier, puis froisse-le et jette-le !"
+        ),
+        "neutral": (
+            "💡 C'est le moment parfait pour essayer quelque chose de nouveau !",
+            "💡 Profite de ce calme pour planifier quelque chose qui te fait envie.",
+            "💡 Un bon moment pour pratiquer la gratitude : 3 choses positives du jour ?"
+        ),
+        "fear": (
+            "💡 Astuce : Ancre-toi dans le présent - nomme 5 choses que tu vois autour de toi.",
+            "💡 La respiration profonde active le système parasympathique et calme l'anxiété.",
+            "💡 Rappelle-toi : 90% de nos inquiétudes ne se réalisent jamais."
+        )
+    }
+
+    # Délai maximal (secondes) sans fragment avant d'abandonner un streaming
+    STREAM_CHUNK_TIMEOUT = 30
+
     def __init__(self, api_key: Optional[str] = None):
         """
         Initialise le moteur de conversation
@@ -96,6 +216,12 @@ Sois authentique, chaleureux et aide l'utilisateur à se sentir écouté et comp
         # Configuration Ollama (local)
         self.ollama_url = os.getenv("OLLAMA_URL", "http://localhost:11434")
         self.ollama_model = os.getenv("OLLAMA_MODEL", "llama3.2")
+
+        # Session HTTP persistante : le keep-alive évite de repayer
+        # l'établissement TCP à chaque message envoyé à Ollama
+        self._http = requests.Session()
+        self._http.headers.update({"Content-Type": "application/json"})
+        self._http.mount("http://", HTTPAdapter(pool_connections=1, pool_maxsize=4))
         
         # Configuration Groq (gratuit)
         self.groq_api_key = os.getenv("GROQ_API_KEY")
@@ -105,19 +231,36 @@ Sois authentique, chaleureux et aide l'utilisateur à se sentir écouté et comp
         
         self.client = None
         self.api_type = None  # 'ollama', 'groq', 'anthropic', ou None
-        self.conversation_history: List[Message] = []
+        # Historiques bornés : l'append reste O(1) et les anciens éléments
+        # sont évincés automatiquement
+        self.conversation_history: Deque[Message] = deque(maxlen=50)
         self.current_emotion: Optional[str] = None
-        self.emotion_history: List[str] = []
+        self.emotion_history: Deque[str] = deque(maxlen=10)
+        # Compteur de persistance : longueur de la série d'émotions
+        # identiques en cours, mis à jour en O(1) à chaque détection
+        self._same_streak = 0
+
+        # Générateur aléatoire propre au moteur (pas de relookup du module)
+        self._rng = random.Random()
         
         self._initialize_client()
     
     def _check_ollama_available(self) -> bool:
-        """Vérifie si Ollama est disponible localement"""
+        """Vérifie si Ollama est disponible localement (résultat mis en cache 60 s)"""
+        now = time.time()
+        cached = _OLLAMA_PROBE_CACHE.get(self.ollama_url)
+        if cached and now - cached[0] < _OLLAMA_PROBE_TTL:
+            return cached[1]
+
         try:
-            response = requests.get(f"{self.ollama_url}/api/tags", timeout=2)
-            return response.status_code == 200
+            # Timeout court : le serveur est local, 500 ms suffisent largement
+            response = self._http.get(f"{self.ollama_url}/api/tags", timeout=0.5)
+            available = response.status_code == 200
         except:
-            return False
+            available = False
+
+        _OLLAMA_PROBE_CACHE[self.ollama_url] = (now, available)
+        return available
     
     def _initialize_client(self):
         """Initialise le client API (Ollama prioritaire car local et gratuit)"""
@@ -167,12 +310,12 @@ Sois authentique, chaleureux et aide l'utilisateur à se sentir écouté et comp
             emotion: Émotion détectée (en anglais)
             confidence: Score de confiance
         """
+        # Série en cours : comparaison entière au lieu d'un parcours
+        # d'historique au moment de construire le contexte
+        self._same_streak = self._same_streak + 1 if emotion == self.current_emotion else 1
         self.current_emotion = emotion
+        # Le deque borné garde seulement les 10 dernières émotions
         self.emotion_history.append(emotion)
-        
-        # Garder seulement les 10 dernières émotions
-        if len(self.emotion_history) > 10:
-            self.emotion_history.pop(0)
     
     def _get_emotion_context_message(self) -> str:
         """Génère le contexte émotionnel pour le prompt"""
@@ -181,12 +324,10 @@ Sois authentique, chaleureux et aide l'utilisateur à se sentir écouté et comp
         
         emotion_fr = EMOTION_CONTEXT_FR.get(self.current_emotion, self.current_emotion)
         
-        # Analyser la tendance émotionnelle
+        # Analyser la tendance émotionnelle (compteur O(1), pas de slice)
         trend_info = ""
-        if len(self.emotion_history) >= 3:
-            recent = self.emotion_history[-3:]
-            if all(e == self.current_emotion for e in recent):
-                trend_info = f" Cette émotion semble persistante."
+        if self._same_streak >= 3:
+            trend_info = " Cette émotion semble persistante."
         
         return f"[Contexte émotionnel: L'utilisateur semble {emotion_fr}.{trend_info}]"
     
@@ -236,27 +377,159 @@ Sois authentique, chaleureux et aide l'utilisateur à se sentir écouté et comp
         ))
         
         return response
-    
+
+    def generate_response_stream(
+        self,
+        user_message: str,
+        emotion: Optional[str] = None,
+        emotion_confidence: float = 0.0
+    ) -> Iterator[str]:
+        """
+        Version streaming de generate_response (pour st.write_stream)
+        Les fragments de texte sont émis dès leur réception au lieu
+        d'attendre la réponse complète
+
+        Args:
+            user_message: Message de l'utilisateur
+            emotion: Émotion actuelle détectée
+            emotion_confidence: Confiance de la détection
+
+        Yields:
+            Fragments de texte de la réponse
+        """
+        # Mettre à jour le contexte émotionnel
+        if emotion:
+            self.set_emotion_context(emotion, emotion_confidence)
+
+        # Ajouter le message utilisateur à l'historique
+        self.conversation_history.append(Message(
+            role="user",
+            content=user_message,
+            emotion_context=emotion
+        ))
+
+        chunks: List[str] = []
+
+        if self.client and self.api_type == 'anthropic':
+            for chunk in self._stream_claude_api(user_message):
+                chunks.append(chunk)
+                yield chunk
+        elif self.api_type == 'ollama':
+            for chunk in self._stream_ollama_api(user_message):
+                chunks.append(chunk)
+                yield chunk
+        else:
+            # APIs sans support streaming : réponse complète en un fragment
+            if self.client and self.api_type == 'groq':
+                response = self._call_groq_api(user_message)
+            else:
+                response = self._generate_fallback_response(user_message)
+            chunks.append(response)
+            yield response
+
+        # Ajouter la réponse complète à l'historique
+        self.conversation_history.append(Message(
+            role="assistant",
+            content="".join(chunks),
+            emotion_context=emotion
+        ))
+
+    def _build_api_messages(self, include_system: bool = False) -> List[Dict[str, str]]:
+        """
+        Construit la liste de messages pour les APIs à partir des 10
+        derniers échanges ; le contexte émotionnel est greffé sur le
+        dernier message après coup plutôt que testé à chaque itération
+        """
+        recent = list(self.conversation_history)[-10:]
+        messages = [{"role": msg.role, "content": msg.content} for msg in recent]
+
+        emotion_context = self._get_emotion_context_message()
+        if emotion_context and messages:
+            messages[-1]["content"] = f"{emotion_context}\n\n{messages[-1]['content']}"
+
+        if include_system:
+            return [self._SYSTEM_MSG] + messages
+        return messages
+
+    def _stream_claude_api(self, user_message: str) -> Iterator[str]:
+        """Appelle l'API Claude en streaming et émet les fragments de texte"""
+        try:
+            messages = self._build_api_messages()
+
+            # Appel API en streaming. Le chien de garde est délégué au
+            # timeout de lecture httpx du SDK : il court entre deux
+            # fragments reçus, donc un flux réellement suspendu lève une
+            # exception (rattrapée ci-dessous) au lieu de bloquer le
+            # générateur en attente d'un fragment qui n'arrive jamais
+            with self.client.messages.stream(
+                model="claude-sonnet-4-20250514",
+                max_tokens=500,
+                system=self.SYSTEM_PROMPT,
+                messages=messages,
+                timeout=self.STREAM_CHUNK_TIMEOUT
+            ) as stream:
+                for text in stream.text_stream:
+                    yield text
+
+        except Exception as e:
+            logger.error(f"Erreur API Claude (streaming): {e}")
+            yield self._generate_fallback_response(user_message)
+
+    def _stream_ollama_api(self, user_message: str) -> Iterator[str]:
+        """
+        Appelle l'API Ollama en streaming et émet les fragments de texte
+        Le premier token arrive dès sa génération au lieu d'attendre la
+        réponse complète
+        """
+        try:
+            messages = self._build_api_messages(include_system=True)
+
+            # Appel API Ollama en streaming (une ligne JSON par fragment)
+            # Corps sérialisé via orjson ; le Content-Type est déjà posé
+            # sur la session
+            response = self._http.post(
+                f"{self.ollama_url}/api/chat",
+                data=_json_dumps({
+                    "model": self.ollama_model,
+                    "messages": messages,
+                    "stream": True,
+                    "options": {
+                        "temperature": 0.7,
+                        "num_predict": 500
+                    }
+                }),
+                stream=True,
+                timeout=60
+            )
+
+            if response.status_code != 200:
+                logger.error(f"Erreur Ollama: {response.status_code}")
+                yield self._generate_fallback_response(user_message)
+                return
+
+            for line in response.iter_lines():
+                if not line:
+                    continue
+                chunk = _json_loads(line)
+                if chunk.get("done"):
+                    break
+                content = chunk.get("message", {}).get("content", "")
+                if content:
+                    yield content
+
+        except Exception as e:
+            logger.error(f"Erreur API Ollama (streaming): {e}")
+            yield self._generate_fallback_response(user_message)
+
     def _call_ollama_api(self, user_message: str) -> str:
         """Appelle l'API Ollama (LOCAL) pour générer une réponse"""
         try:
-            # Construire le contexte émotionnel
-            emotion_context = self._get_emotion_context_message()
-            
-            # Préparer les messages pour l'API
-            messages = [{"role": "system", "content": self.SYSTEM_PROMPT}]
-            
-            # Ajouter l'historique récent
-            for i, msg in enumerate(self.conversation_history[-10:]):
-                content = msg.content
-                if i == len(self.conversation_history[-10:]) - 1 and emotion_context:
-                    content = f"{emotion_context}\n\n{content}"
-                messages.append({"role": msg.role, "content": content})
-            
-            # Appel API Ollama
-            response = requests.post(
+            messages = self._build_api_messages(include_system=True)
+
+            # Appel API Ollama (corps sérialisé via orjson)
+            response = self._http.post(
                 f"{self.ollama_url}/api/chat",
-                json={
+                data=_json_dumps({
                     "model": self.ollama_model,
                     "messages": messages,
                     "stream": False,
@@ -264,12 +537,12 @@ Sois authentique, chaleureux et aide l'utilisateur à se sentir écouté et comp
                         "temperature": 0.7,
                         "num_predict": 500
                     }
-                },
+                }),
                 timeout=60
             )
-            
+
             if response.status_code == 200:
-                result = response.json()
+                result = _json_loads(response.content)
                 return result.get("message", {}).get("content", self._generate_fallback_response(user_message))
             else:
                 logger.error(f"Erreur Ollama: {response.status_code}")
@@ -282,26 +555,12 @@ Sois authentique, chaleureux et aide l'utilisateur à se sentir écouté et comp
     def _call_groq_api(self, user_message: str) -> str:
         """Appelle l'API Groq (GRATUIT) pour générer une réponse"""
         try:
-            # Construire le contexte émotionnel
-            emotion_context = self._get_emotion_context_message()
-            
-            # Préparer les messages pour l'API
-            messages = []
-            
-            # Ajouter l'historique récent
-            for i, msg in enumerate(self.conversation_history[-10:]):
-                content = msg.content
-                if i == len(self.conversation_history[-10:]) - 1 and emotion_context:
-                    content = f"{emotion_context}\n\n{content}"
-                messages.append({"role": msg.role, "content": content})
-            
+            messages = self._build_api_messages()
+
             # Appel API Groq
             response = self.client.chat.completions.create(
                 model="llama-3.3-70b-versatile",  # Modèle gratuit et performant
-                messages=[
-                    {"role": "system", "content": self.SYSTEM_PROMPT},
-                    *messages
-                ],
+                messages=[self._SYSTEM_MSG, *messages],
                 max_tokens=500,
                 temperature=0.7
             )
@@ -315,20 +574,8 @@ Sois authentique, chaleureux et aide l'utilisateur à se sentir écouté et comp
     def _call_claude_api(self, user_message: str) -> str:
         """Appelle l'API Claude pour générer une réponse"""
         try:
-            # Construire le contexte émotionnel
-            emotion_context = self._get_emotion_context_message()
-            
-            # Préparer les messages pour l'API
-            messages = []
-            
-            # Ajouter le contexte émotionnel au premier message si présent
-            for i, msg in enumerate(self.conversation_history[-10:]):  # Limiter l'historique
-                content = msg.content
-                if i == len(self.conversation_history[-10:]) - 1 and emotion_context:
-                    # Ajouter le contexte au dernier message utilisateur
-                    content = f"{emotion_context}\n\n{content}"
-                messages.append({"role": msg.role, "content": content})
-            
+            messages = self._build_api_messages()
+
             # Appel API
             response = self.client.messages.create(
                 model="claude-sonnet-4-20250514",
@@ -349,48 +596,9 @@ Sois authentique, chaleureux et aide l'utilisateur à se sentir écouté et comp
         Réponses pré-définies basées sur l'émotion
         """
         emotion = self.current_emotion or "neutral"
-        
-        responses = {
-            "happy": [
-                "Ça fait plaisir de te voir de bonne humeur ! 😊 Qu'est-ce qui te rend si joyeux aujourd'hui ?",
-                "Ton sourire est contagieux ! Continue comme ça ! Raconte-moi ta journée ?",
-                "Super ! J'adore cette énergie positive ! Qu'est-ce qui s'est passé de bien ?"
-            ],
-            "sad": [
-                "Je vois que tu traverses un moment difficile... Je suis là pour toi. 💙 Tu veux en parler ?",
-                "C'est ok de ne pas aller bien parfois. Qu'est-ce qui te tracasse ?",
-                "Je suis là pour t'écouter, sans jugement. Prends ton temps pour me dire ce qui ne va pas."
-            ],
-            "angry": [
-                "Je comprends que tu sois frustré(e). Prends une grande respiration... 🌬️ Qu'est-ce qui s'est passé ?",
-                "La colère, c'est normal. Veux-tu en parler pour te libérer un peu ?",
-                "Je t'écoute. Parfois, exprimer ce qui nous énerve fait du bien."
-            ],
-            "neutral": [
-                "Hey ! Comment vas-tu ? Qu'est-ce qui t'amène aujourd'hui ? 👋",
-                "Coucou ! Je suis content de te voir. De quoi voudrais-tu parler ?",
-                "Salut ! Comment se passe ta journée jusqu'ici ?"
-            ],
-            "fear": [
-                "Je suis là, tout va bien se passer. 🤗 Qu'est-ce qui t'inquiète ?",
-                "Respire doucement... Je comprends que tu puisses te sentir anxieux. Parle-moi.",
-                "Tu n'es pas seul(e). Dis-moi ce qui te fait peur, on peut en discuter ensemble."
-            ],
-            "surprise": [
-                "Oh ! Tu as l'air surpris(e) ! Il s'est passé quelque chose d'inattendu ?",
-                "Wow, je vois la surprise sur ton visage ! Raconte-moi !",
-                "Qu'est-ce qui t'a surpris comme ça ? Je suis curieux !"
-            ],
-            "disgust": [
-                "Hmm, quelque chose ne semble pas te plaire... Tu veux en parler ?",
-                "Je vois que quelque chose te dérange. Qu'est-ce qui s'est passé ?",
-                "On dirait que tu as vécu quelque chose de désagréable. Je t'écoute."
-            ]
-        }
-        
-        import random
+        responses = self._FALLBACK_RESPONSES
         emotion_responses = responses.get(emotion, responses["neutral"])
-        return random.choice(emotion_responses)
+        return self._rng.choice(emotion_responses)
     
     def get_conversation_history(self) -> List[Dict[str, Any]]:
         """Retourne l'historique de conversation formaté"""
@@ -399,7 +607,7 @@ Sois authentique, chaleureux et aide l'utilisateur à se sentir écouté et comp
                 "role": msg.role,
                 "content": msg.content,
                 "emotion": msg.emotion_context,
-                "timestamp": msg.timestamp.isoformat() if msg.timestamp else None
+                "timestamp": (msg.timestamp or datetime.utcnow()).isoformat()
             }
             for msg in self.conversation_history
         ]
@@ -409,6 +617,7 @@ Sois authentique, chaleureux et aide l'utilisateur à se sentir écouté et comp
         self.conversation_history.clear()
         self.emotion_history.clear()
         self.current_emotion = None
+        self._same_streak = 0
     
     def get_greeting(self, emotion: Optional[str] = None) -> str:
         """
@@ -423,16 +632,7 @@ Sois authentique, chaleureux et aide l'utilisateur à se sentir écouté et comp
         if emotion:
             self.set_emotion_context(emotion)
         
-        greetings = {
-            "happy": "Hey ! 😊 Je vois que tu es de bonne humeur ! Ça fait plaisir !",
-            "sad": "Bonjour... 💙 Je suis là si tu as besoin de parler.",
-            "angry": "Salut. Je vois que quelque chose te tracasse. Je t'écoute.",
-            "neutral": "Bonjour ! 👋 Comment puis-je t'aider aujourd'hui ?",
-            "fear": "Coucou... 🤗 Je suis là, tout va bien. De quoi voudrais-tu parler ?",
-            "surprise": "Oh ! Bonjour ! Tu as l'air surpris(e) de me voir ! 😄",
-            "disgust": "Salut... Quelque chose ne va pas ? Je suis là pour en parler."
-        }
-        
+        greetings = self._GREETINGS
         return greetings.get(emotion or "neutral", greetings["neutral"])
     
     def generate_wellness_tip(self, emotion: str) -> str:
@@ -445,37 +645,9 @@ Sois authentique, chaleureux et aide l'utilisateur à se sentir écouté et comp
         Returns:
             Conseil bien-être
         """
-        tips = {
-            "happy": [
-                "💡 Astuce : Note ce moment de bonheur dans un journal pour t'en souvenir !",
-                "💡 Partage ta bonne humeur avec quelqu'un, la joie est contagieuse !",
-                "💡 Profite de cette énergie pour faire quelque chose que tu aimes !"
-            ],
-            "sad": [
-                "💡 Astuce : Une petite promenade à l'air frais peut aider à éclaircir les idées.",
-                "💡 Écoute une musique que tu aimes, ça peut aider à remonter le moral.",
-                "💡 Prends un moment pour toi : un thé chaud, une couverture, et du repos."
-            ],
-            "angry": [
-                "💡 Astuce : Essaie la respiration 4-7-8 : inspire 4s, retiens 7s, expire 8s.",
-                "💡 L'exercice physique aide à évacuer la frustration. Une petite marche ?",
-                "💡 Écris ce qui t'énerve sur un papier, puis froisse-le et jette-le !"
-            ],
-            "neutral": [
-                "💡 C'est le moment parfait pour essayer quelque chose de nouveau !",
-                "💡 Profite de ce calme pour planifier quelque chose qui te fait envie.",
-                "💡 Un bon moment pour pratiquer la gratitude : 3 choses positives du jour ?"
-            ],
-            "fear": [
-                "💡 Astuce : Ancre-toi dans le présent - nomme 5 choses que tu vois autour de toi.",
-                "💡 La respiration profonde active le système parasympathique et calme l'anxiété.",
-                "💡 Rappelle-toi : 90% de nos inquiétudes ne se réalisent jamais."
-            ]
-        }
-        
-        import random
+        tips = self._WELLNESS_TIPS
         emotion_tips = tips.get(emotion, tips["neutral"])
-        return random.choice(emotion_tips)
+        return self._rng.choice(emotion_tips)
 
 
 # Instance globale pour utilisation simplifiée
@@ -6,27 +6,36 @@ Module de gestion de base de données SQLite
 from .models import (
     User,
     EmotionRecord,
+    EmotionDailyRollup,
     Conversation,
     init_database,
     get_db,
     get_db_session,
     engine,
+    read_engine,
     SessionLocal,
+    ReadSessionLocal,
     Base
 )
 
 from .crud import (
+    # Transactions
+    atomic,
+
     # User operations
     create_user,
     get_user_by_username,
     get_user_by_email,
     get_user_by_id,
+    get_user_by_id_with_emotions,
     update_user_login,
     update_user_consent,
     
     # Emotion operations
     add_emotion_record,
+    add_emotion_records_bulk,
     get_user_emotions,
+    get_user_emotions_brief,
     get_emotions_by_period,
     get_emotion_statistics,
     get_emotion_trend,
@@ -34,40 +43,62 @@ from .crud import (
     # Conversation operations
     add_conversation_message,
     get_conversation_history,
+    get_conversation_count,
     get_recent_conversation,
     clear_conversation_history,
     
     # Analytics
-    get_user_summary
+    get_user_summary,
+    invalidate_user_stats_cache
+)
+
+from .writer import (
+    EmotionWriter,
+    get_emotion_writer,
+    enqueue_emotion
 )
 
 __all__ = [
     # Models
     "User",
-    "EmotionRecord", 
+    "EmotionRecord",
+    "EmotionDailyRollup",
     "Conversation",
     "init_database",
     "get_db",
     "get_db_session",
     "engine",
+    "read_engine",
     "SessionLocal",
+    "ReadSessionLocal",
     "Base",
     
     # CRUD
+    "atomic",
     "create_user",
     "get_user_by_username",
     "get_user_by_email",
     "get_user_by_id",
+    "get_user_by_id_with_emotions",
     "update_user_login",
     "update_user_consent",
     "add_emotion_record",
+    "add_emotion_records_bulk",
     "get_user_emotions",
+    "get_user_emotions_brief",
     "get_emotions_by_period",
     "get_emotion_statistics",
     "get_emotion_trend",
     "add_conversation_message",
     "get_conversation_history",
+    "get_conversation_count",
     "get_recent_conversation",
     "clear_conversation_history",
-    "get_user_summary"
+    "get_user_summary",
+    "invalidate_user_stats_cache",
+
+    # Async writer
+    "EmotionWriter",
+    "get_emotion_writer",
+    "enqueue_emotion"
 ]
@@ -3,11 +3,70 @@ Database CRUD Operations
 Opérations de base de données pour utilisateurs, émotions et conversations
 """
 
-from sqlalchemy.orm import Session
-from sqlalchemy import func, desc
+import threading
+import time
+from contextlib import contextmanager
+
+from sqlalchemy.orm import Session, selectinload
+from sqlalchemy import case, func, desc, insert, text, update
 from datetime import datetime, timedelta
 from typing import List, Optional, Dict, Any
-from .models import User, EmotionRecord, Conversation
+from .models import User, EmotionRecord, EmotionDailyRollup, Conversation
+
+
+# Cache TTL des agrégats analytiques, partitionné par utilisateur pour
+# permettre une invalidation ciblée à chaque écriture
+# Structure : {user_id: {clé: (expiration, valeur)}}
+_STATS_CACHE_TTL = 60
+_stats_cache: Dict[int, Dict[tuple, tuple]] = {}
+_stats_lock = threading.Lock()
+
+
+def _stats_cache_get(user_id: int, key: tuple) -> Optional[Any]:
+    """Retourne la valeur en cache si elle n'a pas expiré, sinon None"""
+    with _stats_lock:
+        entry = _stats_cache.get(user_id, {}).get(key)
+        if entry and entry[0] > time.monotonic():
+            return entry[1]
+    return None
+
+
+def _stats_cache_put(user_id: int, key: tuple, value: Any) -> None:
+    """Mémorise une valeur avec sa date d'expiration"""
+    with _stats_lock:
+        _stats_cache.setdefault(user_id, {})[key] = (
+            time.monotonic() + _STATS_CACHE_TTL, value
+        )
+
+
+def invalidate_user_stats_cache(user_id: int) -> None:
+    """Invalide les agrégats en cache d'un utilisateur (après écriture)"""
+    with _stats_lock:
+        _stats_cache.pop(user_id, None)
+
+
+# Requêtes texte pré-construites pour les lookups les plus chauds :
+# l'objet text() est compilé une fois au chargement du module et SQLite
+# réutilise le prepared statement mis en cache sur la connexion.
+# from_statement les exécute tout en hydratant des objets User normaux
+_Q_USER_BY_USERNAME = text("SELECT * FROM users WHERE username = :u LIMIT 1")
+_Q_USER_BY_EMAIL = text("SELECT * FROM users WHERE email = :e LIMIT 1")
+
+
+@contextmanager
+def atomic(db: Session):
+    """
+    Regroupe plusieurs écritures en une seule transaction
+    Les helpers add_*/update_* appelés avec commit=False à l'intérieur
+    partagent alors un unique COMMIT (donc un seul fsync) ; le moteur
+    d'écriture démarre déjà la transaction en BEGIN IMMEDIATE
+    """
+    try:
+        yield db
+        db.commit()
+    except Exception:
+        db.rollback()
+        raise
 
 
 # ==================== USER OPERATIONS ====================
@@ -27,45 +86,75 @@ def create_user(db: Session, username: str, email: str, password_hash: str) -> U
 
 def get_user_by_username(db: Session, username: str) -> Optional[User]:
     """Récupère un utilisateur par son nom d'utilisateur"""
-    return db.query(User).filter(User.username == username).first()
+    return db.query(User)\
+        .from_statement(_Q_USER_BY_USERNAME)\
+        .params(u=username)\
+        .first()
 
 
 def get_user_by_email(db: Session, email: str) -> Optional[User]:
     """Récupère un utilisateur par son email"""
-    return db.query(User).filter(User.email == email).first()
+    return db.query(User)\
+        .from_statement(_Q_USER_BY_EMAIL)\
+        .params(e=email)\
+        .first()
 
 
 def get_user_by_id(db: Session, user_id: int) -> Optional[User]:
     """Récupère un utilisateur par son ID"""
-    return db.query(User).filter(User.id == user_id).first()
+    # Session.get consulte d'abord l'identity map : les lookups répétés
+    # du même id dans une même session ne retouchent pas la base
+    return db.get(User, user_id)
+
+
+def get_user_by_id_with_emotions(db: Session, user_id: int) -> Optional[User]:
+    """
+    Récupère un utilisateur avec ses émotions pré-chargées
+    selectinload ramène toutes les émotions en une seule requête IN au
+    lieu d'un SELECT paresseux déclenché au premier accès à user.emotions
+    """
+    return db.query(User)\
+        .options(selectinload(User.emotions))\
+        .filter(User.id == user_id)\
+        .first()
 
 
 def update_user_login(db: Session, user_id: int) -> None:
     """Met à jour la date de dernière connexion"""
-    user = db.query(User).filter(User.id == user_id).first()
-    if user:
-        user.last_login = datetime.utcnow()
-        db.commit()
+    # UPDATE direct sur la clé primaire : pas de SELECT préalable ni
+    # d'hydratation ORM, un seul aller-retour
+    db.execute(
+        update(User)
+        .where(User.id == user_id)
+        .values(last_login=func.now())
+    )
+    db.commit()
 
 
 def update_user_consent(db: Session, user_id: int, consent: bool) -> None:
     """Met à jour le consentement webcam de l'utilisateur"""
-    user = db.query(User).filter(User.id == user_id).first()
-    if user:
-        user.consent_webcam = consent
-        db.commit()
+    db.execute(
+        update(User)
+        .where(User.id == user_id)
+        .values(consent_webcam=consent)
+    )
+    db.commit()
 
 
 # ==================== EMOTION OPERATIONS ====================
 
 def add_emotion_record(
-    db: Session, 
-    user_id: int, 
-    emotion: str, 
-    confidence: float, 
-    context: str = None
+    db: Session,
+    user_id: int,
+    emotion: str,
+    confidence: float,
+    context: str = None,
+    commit: bool = True
 ) -> EmotionRecord:
-    """Ajoute un enregistrement d'émotion"""
+    """
+    Ajoute un enregistrement d'émotion
+    commit=False laisse le COMMIT au bloc atomic() englobant
+    """
     record = EmotionRecord(
         user_id=user_id,
         emotion=emotion,
@@ -73,11 +162,35 @@ def add_emotion_record(
         context=context
     )
     db.add(record)
-    db.commit()
-    db.refresh(record)
+    if commit:
+        db.commit()
+        db.refresh(record)
+    invalidate_user_stats_cache(user_id)
     return record
 
 
+# Statement d'insertion compilé une fois au chargement du module
+_INSERT_EMOTION = insert(EmotionRecord)
+
+
+def add_emotion_records_bulk(db: Session, rows: List[Dict[str, Any]]) -> None:
+    """
+    Insère un lot d'enregistrements d'émotions en une seule transaction
+    L'exécution passe par l'executemany du driver sqlite3 : un seul
+    parse/plan, le prepared statement est réutilisé pour chaque ligne,
+    et aucun objet ORM n'est construit
+    Args:
+        rows: Liste de dicts avec les clés user_id, emotion, confidence
+              (et éventuellement context)
+    """
+    if not rows:
+        return
+    db.execute(_INSERT_EMOTION, rows)
+    db.commit()
+    for uid in {row["user_id"] for row in rows}:
+        invalidate_user_stats_cache(uid)
+
+
 def get_user_emotions(
     db: Session, 
     user_id: int, 
@@ -91,6 +204,26 @@ def get_user_emotions(
         .all()
 
 
+def get_user_emotions_brief(
+    db: Session,
+    user_id: int,
+    limit: int = 100
+) -> List[tuple]:
+    """
+    Variante allégée de get_user_emotions : ne projette que les colonnes
+    (emotion, confidence, timestamp) — pas d'objets ORM à hydrater ni de
+    blob TEXT `context` à transporter pour les affichages de listes
+    """
+    return db.query(
+        EmotionRecord.emotion,
+        EmotionRecord.confidence,
+        EmotionRecord.timestamp
+    ).filter(EmotionRecord.user_id == user_id)\
+        .order_by(desc(EmotionRecord.timestamp))\
+        .limit(limit)\
+        .all()
+
+
 def get_emotions_by_period(
     db: Session, 
     user_id: int, 
@@ -111,84 +244,95 @@ def get_emotion_statistics(db: Session, user_id: int, days: int = 7) -> Dict[str
     """
     Calcule les statistiques émotionnelles d'un utilisateur
     Retourne la distribution des émotions et l'émotion dominante
+    Le résultat est mémorisé 60 s (invalidé à chaque nouvelle écriture)
     """
+    cache_key = ('stats', days)
+    cached = _stats_cache_get(user_id, cache_key)
+    if cached is not None:
+        return cached
+
     start_date = datetime.utcnow() - timedelta(days=days)
-    
-    # Compter les émotions par type
+
+    # Compter les émotions par type ; les fonctions de fenêtrage font
+    # sortir le total et le rang de la même passe SQL, sans second
+    # parcours Python pour sum() et max()
+    count_col = func.count(EmotionRecord.id)
     emotion_counts = db.query(
         EmotionRecord.emotion,
-        func.count(EmotionRecord.id).label('count'),
-        func.avg(EmotionRecord.confidence).label('avg_confidence')
+        count_col.label('count'),
+        func.avg(EmotionRecord.confidence).label('avg_confidence'),
+        func.sum(count_col).over().label('total'),
+        func.rank().over(order_by=count_col.desc()).label('rank')
     ).filter(
         EmotionRecord.user_id == user_id,
         EmotionRecord.timestamp >= start_date
     ).group_by(EmotionRecord.emotion).all()
-    
+
     if not emotion_counts:
-        return {
+        empty = {
             "distribution": {},
             "dominant_emotion": None,
             "total_records": 0,
             "period_days": days
         }
-    
-    # Calculer la distribution
-    total = sum(ec.count for ec in emotion_counts)
-    distribution = {
-        ec.emotion: {
+        _stats_cache_put(user_id, cache_key, empty)
+        return empty
+
+    # Calculer la distribution (total et rang déjà fournis par SQL)
+    total = emotion_counts[0].total
+    dominant_emotion = None
+    distribution = {}
+    for ec in emotion_counts:
+        distribution[ec.emotion] = {
             "count": ec.count,
             "percentage": round((ec.count / total) * 100, 1),
             "avg_confidence": round(ec.avg_confidence, 2)
         }
-        for ec in emotion_counts
-    }
-    
-    # Trouver l'émotion dominante
-    dominant = max(emotion_counts, key=lambda x: x.count)
-    
-    return {
+        if ec.rank == 1:
+            dominant_emotion = ec.emotion
+
+    stats = {
         "distribution": distribution,
-        "dominant_emotion": dominant.emotion,
+        "dominant_emotion": dominant_emotion,
         "total_records": total,
         "period_days": days
     }
+    _stats_cache_put(user_id, cache_key, stats)
+    return stats
 
 
 def get_emotion_trend(db: Session, user_id: int, days: int = 7) -> List[Dict]:
     """Récupère la tendance émotionnelle par jour"""
-    start_date = datetime.utcnow() - timedelta(days=days)
-    
-    records = db.query(EmotionRecord)\
-        .filter(
-            EmotionRecord.user_id == user_id,
-            EmotionRecord.timestamp >= start_date
-        )\
-        .order_by(EmotionRecord.timestamp)\
-        .all()
-    
-    # Grouper par jour
-    daily_data = {}
-    for record in records:
-        day = record.timestamp.strftime("%Y-%m-%d")
-        if day not in daily_data:
-            daily_data[day] = {"emotions": [], "count": 0}
-        daily_data[day]["emotions"].append(record.emotion)
-        daily_data[day]["count"] += 1
-    
+    start_day = (datetime.utcnow() - timedelta(days=days)).strftime("%Y-%m-%d")
+
+    # Lecture directe du rollup journalier entretenu par triggers :
+    # O(jours x émotions) lignes au lieu de re-grouper chaque détection
+    rows = db.query(
+        EmotionDailyRollup.day,
+        EmotionDailyRollup.emotion,
+        EmotionDailyRollup.count
+    ).filter(
+        EmotionDailyRollup.user_id == user_id,
+        EmotionDailyRollup.day >= start_day,
+        EmotionDailyRollup.count > 0
+    ).all()
+
+    # Regrouper les comptes par jour
+    daily_counts: Dict[str, Dict[str, int]] = {}
+    for row in rows:
+        daily_counts.setdefault(row.day, {})[row.emotion] = row.count
+
     # Calculer l'émotion dominante par jour
     trend = []
-    for day, data in sorted(daily_data.items()):
-        emotion_counts = {}
-        for emotion in data["emotions"]:
-            emotion_counts[emotion] = emotion_counts.get(emotion, 0) + 1
+    for day, emotion_counts in sorted(daily_counts.items()):
         dominant = max(emotion_counts, key=emotion_counts.get)
         trend.append({
             "date": day,
             "dominant_emotion": dominant,
-            "total_detections": data["count"],
+            "total_detections": sum(emotion_counts.values()),
             "distribution": emotion_counts
         })
-    
+
     return trend
 
 
@@ -199,9 +343,13 @@ def add_conversation_message(
     user_id: int,
     role: str,
     content: str,
-    emotion_context: str = None
+    emotion_context: str = None,
+    commit: bool = True
 ) -> Conversation:
-    """Ajoute un message à la conversation"""
+    """
+    Ajoute un message à la conversation
+    commit=False laisse le COMMIT au bloc atomic() englobant
+    """
     message = Conversation(
         user_id=user_id,
         role=role,
@@ -209,8 +357,10 @@ def add_conversation_message(
         emotion_context=emotion_context
     )
     db.add(message)
-    db.commit()
-    db.refresh(message)
+    if commit:
+        db.commit()
+        db.refresh(message)
+    invalidate_user_stats_cache(user_id)
     return message
 
 
@@ -227,6 +377,13 @@ def get_conversation_history(
         .all()
 
 
+def get_conversation_count(db: Session, user_id: int) -> int:
+    """Compte les messages d'un utilisateur sans charger leur contenu"""
+    return db.query(func.count(Conversation.id))\
+        .filter(Conversation.user_id == user_id)\
+        .scalar()
+
+
 def get_recent_conversation(
     db: Session,
     user_id: int,
@@ -245,31 +402,103 @@ def get_recent_conversation(
 
 def clear_conversation_history(db: Session, user_id: int) -> int:
     """Efface l'historique de conversation d'un utilisateur"""
+    # DELETE en masse : synchronize_session=False évite le SELECT des
+    # clés primaires que SQLAlchemy ferait pour synchroniser sa session
     deleted = db.query(Conversation)\
         .filter(Conversation.user_id == user_id)\
-        .delete()
+        .delete(synchronize_session=False)
     db.commit()
+    invalidate_user_stats_cache(user_id)
     return deleted
 
 
 # ==================== ANALYTICS ====================
 
+def _build_stats_dict(counts: List[tuple], days: int) -> Dict[str, Any]:
+    """Met en forme des triplets (émotion, count, avg_confidence) au même
+    format que get_emotion_statistics"""
+    counts = [c for c in counts if c[1]]
+    if not counts:
+        return {
+            "distribution": {},
+            "dominant_emotion": None,
+            "total_records": 0,
+            "period_days": days
+        }
+
+    total = sum(c[1] for c in counts)
+    distribution = {
+        emotion: {
+            "count": count,
+            "percentage": round((count / total) * 100, 1),
+            "avg_confidence": round(avg_confidence, 2)
+        }
+        for emotion, count, avg_confidence in counts
+    }
+    dominant = max(counts, key=lambda c: c[1])
+
+    return {
+        "distribution": distribution,
+        "dominant_emotion": dominant[0],
+        "total_records": total,
+        "period_days": days
+    }
+
+
 def get_user_summary(db: Session, user_id: int) -> Dict[str, Any]:
-    """Récupère un résumé complet de l'activité utilisateur"""
+    """
+    Récupère un résumé complet de l'activité utilisateur
+    Le résultat est mémorisé 60 s (invalidé à chaque nouvelle écriture)
+    """
+    cache_key = ('summary',)
+    cached = _stats_cache_get(user_id, cache_key)
+    if cached is not None:
+        return cached
+
     user = get_user_by_id(db, user_id)
     if not user:
         return None
-    
-    total_emotions = db.query(func.count(EmotionRecord.id))\
-        .filter(EmotionRecord.user_id == user_id).scalar()
-    
-    total_messages = db.query(func.count(Conversation.id))\
-        .filter(Conversation.user_id == user_id).scalar()
-    
-    stats_7d = get_emotion_statistics(db, user_id, days=7)
-    stats_30d = get_emotion_statistics(db, user_id, days=30)
-    
-    return {
+
+    now = datetime.utcnow()
+    start_7d = now - timedelta(days=7)
+    start_30d = now - timedelta(days=30)
+
+    # Les deux compteurs globaux en un seul aller-retour
+    total_emotions, total_messages = db.execute(
+        text(
+            "SELECT "
+            "(SELECT COUNT(*) FROM emotion_records WHERE user_id = :uid), "
+            "(SELECT COUNT(*) FROM conversations WHERE user_id = :uid)"
+        ),
+        {"uid": user_id}
+    ).one()
+
+    # Un seul GROUP BY sur la fenêtre de 30 jours ; la tranche 7 jours
+    # est extraite par agrégation conditionnelle (le 7 j est un
+    # sous-ensemble du 30 j, inutile de rescanner la table)
+    rows = db.query(
+        EmotionRecord.emotion,
+        func.sum(
+            case((EmotionRecord.timestamp >= start_7d, 1), else_=0)
+        ).label('count_7d'),
+        func.avg(
+            case((EmotionRecord.timestamp >= start_7d, EmotionRecord.confidence))
+        ).label('avg_conf_7d'),
+        func.count(EmotionRecord.id).label('count_30d'),
+        func.avg(EmotionRecord.confidence).label('avg_conf_30d')
+    ).filter(
+        EmotionRecord.user_id == user_id,
+        EmotionRecord.timestamp >= start_30d
+    ).group_by(EmotionRecord.emotion).all()
+
+    stats_7d = _build_stats_dict(
+        [(r.emotion, r.count_7d, r.avg_conf_7d) for r in rows], days=7
+    )
+    stats_30d = _build_stats_dict(
+        [(r.emotion, r.count_30d, r.avg_conf_30d) for r in rows], days=30
+    )
+
+    summary = {
         "user": {
             "id": user.id,
             "username": user.username,
@@ -284,3 +513,5 @@ def get_user_summary(db: Session, user_id: int) -> Dict[str, Any]:
             "last_30_days": stats_30d
         }
     }
+    _stats_cache_put(user_id, cache_key, summary)
+    return summary
@@ -3,20 +3,114 @@ Database Models - SQLite with SQLAlchemy
 Modèles de base de données pour l'application IA émotionnelle
 """
 
-from sqlalchemy import create_engine, Column, Integer, String, Float, DateTime, ForeignKey, Text, Boolean
+from sqlalchemy import create_engine, event, func, text, Column, Index, Integer, SmallInteger, String, Float, DateTime, ForeignKey, Text, Boolean
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker, relationship
+from sqlalchemy.types import TypeDecorator
 from datetime import datetime
 import os
 
 # Base de données SQLite
 DATABASE_URL = os.getenv("DATABASE_URL", "sqlite:///emotion_ai.db")
 
-engine = create_engine(DATABASE_URL, echo=False)
+# Moteur unique au niveau module : le pool de connexions est partagé
+# par tous les reruns Streamlit au lieu d'être recréé à chaque session.
+# pool_pre_ping écarte les connexions mortes avant de les réutiliser
+_SQLITE_CONNECT_ARGS = (
+    {"check_same_thread": False, "timeout": 5.0}
+    if DATABASE_URL.startswith("sqlite") else {}
+)
+
+# Deux moteurs sur la même base : SQLite sérialise les écritures au
+# niveau fichier, donc un seul écrivain suffit (pool de 1) tandis que
+# WAL autorise plusieurs lecteurs en parallèle (pool de 8)
+engine = create_engine(
+    DATABASE_URL,
+    echo=False,
+    pool_pre_ping=True,
+    pool_size=1,
+    max_overflow=0,
+    connect_args=_SQLITE_CONNECT_ARGS
+)
+read_engine = create_engine(
+    DATABASE_URL,
+    echo=False,
+    pool_pre_ping=True,
+    pool_size=8,
+    connect_args=_SQLITE_CONNECT_ARGS
+)
+
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+ReadSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=read_engine)
 Base = declarative_base()
 
 
+def _set_sqlite_pragmas(dbapi_connection, connection_record):
+    """
+    Règle les PRAGMA SQLite à chaque nouvelle connexion :
+    - WAL : les lectures ne bloquent plus l'écrivain (et inversement)
+    - synchronous=NORMAL : un fsync par checkpoint au lieu d'un par commit
+    - cache/temp/mmap : garde les pages chaudes en mémoire
+    - busy_timeout : attend le verrou au lieu d'échouer en SQLITE_BUSY
+    """
+    cursor = dbapi_connection.cursor()
+    cursor.execute("PRAGMA journal_mode=WAL")
+    cursor.execute("PRAGMA synchronous=NORMAL")
+    cursor.execute("PRAGMA cache_size=-64000")
+    cursor.execute("PRAGMA temp_store=MEMORY")
+    cursor.execute("PRAGMA mmap_size=268435456")
+    cursor.execute("PRAGMA busy_timeout=5000")
+    cursor.execute("PRAGMA foreign_keys=ON")
+    cursor.close()
+
+
+def _begin_immediate(conn):
+    """
+    Démarre les transactions d'écriture en BEGIN IMMEDIATE : le verrou
+    d'écriture est pris immédiatement au lieu d'être promu plus tard,
+    ce qui évite les SQLITE_BUSY au milieu d'une transaction
+    """
+    conn.exec_driver_sql("BEGIN IMMEDIATE")
+
+
+if DATABASE_URL.startswith("sqlite"):
+    event.listens_for(engine, "connect")(_set_sqlite_pragmas)
+    event.listens_for(read_engine, "connect")(_set_sqlite_pragmas)
+    event.listens_for(engine, "begin")(_begin_immediate)
+
+
+class EmotionType(TypeDecorator):
+    """
+    Stocke l'émotion comme petit entier (1-2 octets) plutôt que VARCHAR :
+    feuilles de B-tree plus compactes, GROUP BY sur clés entières et index
+    couvrant plus serré. La conversion chaîne <-> entier est transparente,
+    le reste du code continue de manipuler 'happy', 'sad', etc.
+    """
+    impl = SmallInteger
+    cache_ok = True
+
+    _TO_INT = {
+        "happy": 0,
+        "sad": 1,
+        "angry": 2,
+        "neutral": 3,
+        "surprise": 4,
+        "fear": 5,
+        "disgust": 6
+    }
+    _TO_STR = {v: k for k, v in _TO_INT.items()}
+
+    def process_bind_param(self, value, dialect):
+        if value is None or isinstance(value, int):
+            return value
+        return self._TO_INT.get(value, value)
+
+    def process_result_value(self, value, dialect):
+        if value is None:
+            return None
+        return self._TO_STR.get(value, value)
+
+
 class User(Base):
     """
     Modèle Utilisateur
@@ -28,7 +122,12 @@ class User(Base):
     username = Column(String(50), unique=True, nullable=False, index=True)
     email = Column(String(100), unique=True, nullable=False, index=True)
     password_hash = Column(String(255), nullable=False)
-    created_at = Column(DateTime, default=datetime.utcnow)
+    # Horodatage côté serveur : SQLite injecte CURRENT_TIMESTAMP (UTC)
+    # dans la ligne, sans aller-retour d'un datetime Python par insertion.
+    # Le default Python est conservé : create_all n'ajoute pas le défaut
+    # serveur aux tables déjà existantes, sans lui les bases antérieures
+    # écriraient NULL
+    created_at = Column(DateTime, default=datetime.utcnow, server_default=func.now())
     last_login = Column(DateTime, nullable=True)
     is_active = Column(Boolean, default=True)
     consent_webcam = Column(Boolean, default=False)  # Consentement webcam (éthique IA)
@@ -47,12 +146,23 @@ class EmotionRecord(Base):
     Stocke chaque détection avec score de confiance
     """
     __tablename__ = "emotion_records"
-    
+
+    # Index couvrant : les lectures chaudes filtrent (user_id, timestamp)
+    # et n'agrègent que emotion/confidence — avec ces colonnes dans
+    # l'index, SQLite sert les GROUP BY en index-only scan sans jamais
+    # toucher les lignes de la table
+    __table_args__ = (
+        Index("ix_emotion_cover", "user_id", "timestamp", "emotion", "confidence"),
+    )
+
     id = Column(Integer, primary_key=True, index=True)
     user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
-    emotion = Column(String(20), nullable=False)  # happy, sad, angry, neutral, etc.
+    emotion = Column(EmotionType, nullable=False)  # happy, sad, angry, neutral, etc.
     confidence = Column(Float, nullable=False)  # Score de confiance 0-1
-    timestamp = Column(DateTime, default=datetime.utcnow, index=True)
+    # default Python conservé pour les bases créées avant le défaut
+    # serveur (cf. User.created_at) ; indispensable ici : un timestamp
+    # NULL ferait échouer le trigger de rollup (day NOT NULL)
+    timestamp = Column(DateTime, default=datetime.utcnow, server_default=func.now())
     context = Column(Text, nullable=True)  # Contexte de la conversation
     
     # Relations
@@ -68,13 +178,20 @@ class Conversation(Base):
     Stocke les échanges avec l'assistant
     """
     __tablename__ = "conversations"
-    
+
+    # Même logique que pour les émotions : l'historique est toujours lu
+    # par utilisateur et trié par date
+    __table_args__ = (
+        Index("ix_conv_user_ts", "user_id", "timestamp"),
+    )
+
     id = Column(Integer, primary_key=True, index=True)
     user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
     role = Column(String(20), nullable=False)  # 'user' ou 'assistant'
     content = Column(Text, nullable=False)
     emotion_context = Column(String(20), nullable=True)  # Émotion au moment du message
-    timestamp = Column(DateTime, default=datetime.utcnow, index=True)
+    # default Python conservé pour les bases antérieures (cf. User.created_at)
+    timestamp = Column(DateTime, default=datetime.utcnow, server_default=func.now())
     
     # Relations
     user = relationship("User", back_populates="conversations")
@@ -83,24 +200,103 @@ class Conversation(Base):
         return f"<Conversation(role='{self.role}', timestamp='{self.timestamp}')>"
 
 
+class EmotionDailyRollup(Base):
+    """
+    Agrégat journalier des émotions, entretenu par triggers SQLite
+    L'historique étant append-only, les comptes des jours passés ne
+    changent jamais : la tendance se lit en O(jours x émotions) au lieu
+    de re-grouper chaque détection brute
+    """
+    __tablename__ = "emotion_daily_rollup"
+
+    user_id = Column(Integer, primary_key=True)
+    day = Column(String(10), primary_key=True)  # Date ISO "YYYY-MM-DD"
+    emotion = Column(EmotionType, primary_key=True)
+    count = Column(Integer, nullable=False, default=0)
+
+    def __repr__(self):
+        return f"<EmotionDailyRollup(day='{self.day}', emotion='{self.emotion}', count={self.count})>"
+
+
 def init_database():
     """Initialise la base de données et crée les tables"""
     Base.metadata.create_all(bind=engine)
+    # Migration légère : create_all ignore les tables existantes, donc on
+    # pose explicitement les index composites sur les bases déjà créées
+    with engine.connect() as conn:
+        # L'index couvrant remplace l'ancien composite (même préfixe,
+        # colonnes d'agrégation en plus) : garder les deux doublerait le
+        # coût de chaque insertion
+        conn.execute(text("DROP INDEX IF EXISTS ix_emotion_user_ts"))
+        conn.execute(text(
+            "CREATE INDEX IF NOT EXISTS ix_emotion_cover "
+            "ON emotion_records (user_id, timestamp, emotion, confidence)"
+        ))
+        conn.execute(text(
+            "CREATE INDEX IF NOT EXISTS ix_conv_user_ts "
+            "ON conversations (user_id, timestamp)"
+        ))
+        # Migration : convertir les émotions encore stockées en texte
+        # (le typage dynamique de SQLite laisse cohabiter les deux)
+        emotion_cases = " ".join(
+            f"WHEN '{name}' THEN {code}"
+            for name, code in EmotionType._TO_INT.items()
+        )
+        conn.execute(text(
+            f"UPDATE emotion_records SET emotion = CASE emotion {emotion_cases} "
+            "ELSE emotion END WHERE typeof(emotion) = 'text'"
+        ))
+        # Triggers d'entretien du rollup journalier : chaque insertion
+        # incrémente le compteur du jour, chaque suppression le décrémente
+        conn.execute(text(
+            "CREATE TRIGGER IF NOT EXISTS trg_emotion_rollup_ins "
+            "AFTER INSERT ON emotion_records BEGIN "
+            "INSERT INTO emotion_daily_rollup (user_id, day, emotion, count) "
+            "VALUES (NEW.user_id, date(NEW.timestamp), NEW.emotion, 1) "
+            "ON CONFLICT(user_id, day, emotion) "
+            "DO UPDATE SET count = count + 1; "
+            "END"
+        ))
+        conn.execute(text(
+            "CREATE TRIGGER IF NOT EXISTS trg_emotion_rollup_del "
+            "AFTER DELETE ON emotion_records BEGIN "
+            "UPDATE emotion_daily_rollup SET count = count - 1 "
+            "WHERE user_id = OLD.user_id AND day = date(OLD.timestamp) "
+            "AND emotion = OLD.emotion; "
+            "END"
+        ))
+        # Backfill unique : reconstruire le rollup depuis les lignes brutes
+        # s'il est encore vide
+        rollup_count = conn.execute(
+            text("SELECT COUNT(*) FROM emotion_daily_rollup")
+        ).scalar()
+        if not rollup_count:
+            conn.execute(text(
+                "INSERT INTO emotion_daily_rollup (user_id, day, emotion, count) "
+                "SELECT user_id, date(timestamp), emotion, COUNT(*) "
+                "FROM emotion_records GROUP BY user_id, date(timestamp), emotion"
+            ))
+        conn.commit()
     print("✅ Base de données initialisée avec succès!")
 
 
-def get_db():
+def get_db(readonly: bool = False):
     """Générateur de session de base de données"""
-    db = SessionLocal()
+    db = ReadSessionLocal() if readonly else SessionLocal()
     try:
         yield db
     finally:
         db.close()
 
 
-def get_db_session():
-    """Retourne une nouvelle session de base de données"""
-    return SessionLocal()
+def get_db_session(readonly: bool = False):
+    """
+    Retourne une nouvelle session de base de données
+    Args:
+        readonly: True pour une session du pool de lecture (parallélisable
+                  sous WAL), False pour la session d'écriture unique
+    """
+    return ReadSessionLocal() if readonly else SessionLocal()
 
 
 if __name__ == "__main__":
@@ -0,0 +1,146 @@
+"""
+Database Writer - Écriture asynchrone des émotions
+Thread d'écriture en arrière-plan : la boucle de détection temps réel
+dépose ses enregistrements dans une file et n'attend jamais un fsync
+"""
+
+import logging
+import queue
+import threading
+from typing import Any, Callable, Dict, Optional
+
+from .models import SessionLocal
+from .crud import add_emotion_records_bulk
+
+logger = logging.getLogger(__name__)
+
+# Sentinelle de fin : déposée dans la file pour arrêter proprement le thread
+_STOP = object()
+
+# Paramètres de lotissement : on vide la file dès 64 éléments ou après
+# 500 ms d'attente, ce qui ramène ~30 commits/s à ~2 commits/s
+_BATCH_SIZE = 64
+_FLUSH_INTERVAL = 0.5
+
+
+class EmotionWriter:
+    """
+    Consommateur d'une file d'enregistrements d'émotions
+    Les écritures sont regroupées puis persistées via bulk insert dans
+    une session dédiée au thread
+    """
+
+    def __init__(self, on_flush: Optional[Callable[[], None]] = None):
+        """
+        Args:
+            on_flush: Callback optionnel appelé après chaque lot persisté
+                      (ex: invalidation d'un cache applicatif)
+        """
+        self._queue: "queue.Queue" = queue.Queue()
+        self._on_flush = on_flush
+        # Compteur d'enregistrements perdus sur échec de flush (exposé
+        # pour la supervision)
+        self.dropped_records = 0
+        self._thread = threading.Thread(
+            target=self._run,
+            daemon=True,
+            name="emotion-writer"
+        )
+
+    def start(self) -> "EmotionWriter":
+        """Démarre le thread d'écriture"""
+        self._thread.start()
+        return self
+
+    def enqueue(
+        self,
+        user_id: int,
+        emotion: str,
+        confidence: float,
+        context: str = None
+    ) -> None:
+        """Dépose un enregistrement sans bloquer l'appelant"""
+        self._queue.put_nowait({
+            "user_id": user_id,
+            "emotion": emotion,
+            "confidence": confidence,
+            "context": context
+        })
+
+    def stop(self, timeout: float = 2.0) -> None:
+        """Arrête le thread après avoir vidé la file"""
+        self._queue.put(_STOP)
+        self._thread.join(timeout=timeout)
+
+    def _run(self) -> None:
+        """Boucle du thread : draine la file et persiste par lots"""
+        stopping = False
+        while not stopping:
+            # Attendre le premier élément (borne l'attente pour pouvoir
+            # regrouper ce qui arrive pendant l'intervalle)
+            try:
+                item = self._queue.get(timeout=_FLUSH_INTERVAL)
+            except queue.Empty:
+                continue
+
+            batch = []
+            if item is _STOP:
+                stopping = True
+            else:
+                batch.append(item)
+
+            # Regrouper tout ce qui est déjà en attente
+            while len(batch) < _BATCH_SIZE:
+                try:
+                    item = self._queue.get_nowait()
+                except queue.Empty:
+                    break
+                if item is _STOP:
+                    stopping = True
+                    break
+                batch.append(item)
+
+            if batch:
+                self._flush(batch)
+
+    def _flush(self, batch: list) -> None:
+        """Persiste un lot dans une session dédiée"""
+        db = SessionLocal()
+        try:
+            add_emotion_records_bulk(db, batch)
+            if self._on_flush:
+                self._on_flush()
+        except Exception as e:
+            db.rollback()
+            self.dropped_records += len(batch)
+            logger.error(
+                "❌ Échec de persistance d'un lot de %d émotions "
+                "(%d perdues au total): %s",
+                len(batch), self.dropped_records, e
+            )
+        finally:
+            db.close()
+
+
+# Instance globale paresseuse pour utilisation simplifiée
+_writer_instance: Optional[EmotionWriter] = None
+_writer_lock = threading.Lock()
+
+
+def get_emotion_writer(on_flush: Optional[Callable[[], None]] = None) -> EmotionWriter:
+    """Retourne (en le démarrant au besoin) le writer singleton"""
+    global _writer_instance
+    with _writer_lock:
+        if _writer_instance is None:
+            _writer_instance = EmotionWriter(on_flush=on_flush).start()
+    return _writer_instance
+
+
+def enqueue_emotion(
+    user_id: int,
+    emotion: str,
+    confidence: float,
+    context: str = None
+) -> None:
+    """Dépose un enregistrement d'émotion dans la file du writer global"""
+    get_emotion_writer().enqueue(user_id, emotion, confidence, context)
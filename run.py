@@ -3,7 +3,6 @@
 Script de lancement de l'application Emotion AI
 """
 
-import subprocess
 import sys
 import os
 
@@ -52,13 +51,18 @@ def run_app():
     print("\n" + "="*50)
     print("🎭 Démarrage de Emotion AI...")
     print("="*50 + "\n")
-    
-    subprocess.run([
-        sys.executable, "-m", "streamlit", "run", 
+
+    # Lancement dans le processus courant : évite le démarrage d'un
+    # second interpréteur Python et la réimportation de streamlit/cv2/
+    # numpy déjà chargés par les vérifications ci-dessus
+    from streamlit.web import cli as stcli
+    sys.argv = [
+        "streamlit", "run",
         "app.py",
         "--server.headless", "true",
         "--browser.gatherUsageStats", "false"
-    ])
+    ]
+    sys.exit(stcli.main())
 
 def main():
     """Point d'entrée principal"""